@@ -0,0 +1,98 @@
+# Tweets per second for the single-pass TextNormalizer.extract against the
+# separate passes it replaces (URL, mention and '#' substitutions,
+# emoji.demojize and a hashtag findall), on emoji-heavy tweets. Outputs must match.
+# Run from the repository root: python -m benchmarks.bench_extract --rows 20000
+import argparse
+import re
+import time
+
+import emoji
+
+from benchmarks.synthetic import make_tweets
+from text_processing import HASHTAG_PATTERN, TextNormalizer
+
+URL_PATTERN = re.compile(r'http\S+|www\S+|https\S+', flags=re.MULTILINE)
+MENTION_PATTERN = re.compile(r'\@\w+')
+MENTION_OR_HASH_PATTERN = re.compile(r'\@\w+|\#')
+NON_WORD_PATTERN = re.compile(r'[^\w\s]')
+
+
+class PlainNormalizer(TextNormalizer):
+    # Without NLTK data: no lemmatization, wordcloud's stopwords
+    @property
+    def lemmatize(self):
+        return str
+
+    @property
+    def stop_words(self):
+        from wordcloud import STOPWORDS
+        return STOPWORDS
+
+
+# The Dashboard's cleaning and hashtag extraction before the single-pass extractor, up to tokenizing
+def multi_pass_scan(text):
+    lowered = text.lower()
+    cleaned = URL_PATTERN.sub('', lowered)
+    mentions = MENTION_PATTERN.findall(cleaned)
+    cleaned = MENTION_OR_HASH_PATTERN.sub('', cleaned)
+    cleaned = NON_WORD_PATTERN.sub('', emoji.demojize(cleaned))
+    return cleaned, HASHTAG_PATTERN.findall(lowered), mentions, len(URL_PATTERN.findall(lowered))
+
+
+def multi_pass(normalizer, text):
+    cleaned, hashtags, mentions, url_count = multi_pass_scan(text)
+    stop_words = normalizer.stop_words
+    lemmatize = normalizer.lemmatize
+    cleaned = ' '.join(lemmatize(word) for word in normalizer.tokenize(cleaned) if word not in stop_words)
+    return cleaned, hashtags, mentions, url_count
+
+
+def time_it(label, func, texts, repeat):
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(texts)
+        runs.append(time.perf_counter() - start)
+    elapsed = min(runs)
+    print(f"{label:<24} {elapsed:8.2f}s  {len(texts) / elapsed:10.0f} tweets/s")
+    return result, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Single-pass tweet extraction benchmark")
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--max-emoji', type=int, default=6, help="emoji per tweet (every tweet has some)")
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    texts = make_tweets(args.rows, emoji_ratio=1.0, max_emoji=args.max_emoji)['Tweet_Content'].tolist()
+    normalizer = TextNormalizer()
+    try:
+        normalizer.preprocess(texts[0])
+    except LookupError:
+        print("NLTK data not installed, comparing without lemmatization")
+        normalizer = PlainNormalizer()
+    # Warm the lemma cache and the emoji table so both runs start alike
+    normalizer.extract_batch(texts)
+    emoji.demojize(texts[0])
+
+    # Extraction alone, then with the tokenizing and lemmatizing both share
+    before, before_time = time_it('multi-pass scan', lambda batch: [multi_pass_scan(text) for text in batch],
+                                  texts, args.repeat)
+    after, after_time = time_it('single-pass scan', lambda batch: [normalizer.scan(text)[:4] for text in batch],
+                                texts, args.repeat)
+    assert after == before, 'scan() differs from the separate passes'
+    print(f"scan speedup x{before_time / after_time:.2f}")
+
+    before, before_time = time_it('multi-pass preprocess', lambda batch: [multi_pass(normalizer, text) for text in batch],
+                                  texts, args.repeat)
+    after, after_time = time_it('single-pass extract', normalizer.extract_batch, texts, args.repeat)
+    # Mentions are compared as found; the multi-pass run found them after URL removal
+    assert [(f.cleaned, f.hashtags, f.mentions, f.url_count) for f in after] == before, \
+        'extract() differs from the separate passes'
+    emoji_count = sum(len(feature.emojis) for feature in after)
+    print(f"speedup x{before_time / after_time:.2f}  ({emoji_count / len(texts):.1f} emoji per tweet)")
+
+
+if __name__ == '__main__':
+    main()
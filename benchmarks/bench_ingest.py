@@ -0,0 +1,97 @@
+# Sequential vs concurrent ingestion of a multi-file upload: CSV, gzipped CSV,
+# zipped CSV and Parquet exports of overlapping scrapes, where part of every
+# file repeats tweets of the other files as retweets, with other links or case.
+# Every mode must keep the same rows, one per distinct tweet.
+# Run from the repository root: python -m benchmarks.bench_ingest --rows 400000 --files 16
+import argparse
+import gzip
+import io
+import os
+import random
+import time
+import zipfile
+
+import pandas as pd
+
+import ingest
+from benchmarks.synthetic import make_tweets
+
+FORMATS = ['csv.gz', 'zip', 'parquet', 'csv']
+
+
+# A near-duplicate of a tweet, as another scrape would have it
+def repost(text, rng):
+    variant = rng.randrange(3)
+    if variant == 0:
+        return f"RT @fan{rng.randrange(1000)}: {text}"
+    if variant == 1:
+        return f"{text.upper()} https://t.co/{rng.randrange(10 ** 9)}"
+    return f"{text}!!"
+
+
+def encode(frame, name, kind):
+    if kind == 'parquet':
+        buffer = io.BytesIO()
+        frame.to_parquet(buffer, index=False)
+        return f"{name}.parquet", buffer.getvalue()
+    data = frame.to_csv(index=False).encode('utf-8')
+    if kind == 'csv.gz':
+        return f"{name}.csv.gz", gzip.compress(data)
+    if kind == 'zip':
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr(f"{name}.csv", data)
+        return f"{name}.zip", buffer.getvalue()
+    return f"{name}.csv", data
+
+
+# files uploads of rows tweets in total, overlap of each file copied from the other files
+def make_uploads(rows, files, overlap, seed=0):
+    rng = random.Random(seed)
+    tweets = make_tweets(rows, seed=seed)
+    parts = [tweets.iloc[start::files] for start in range(files)]
+    uploads = []
+    for index, part in enumerate(parts):
+        copies = tweets.drop(part.index).sample(int(len(part) * overlap), random_state=seed + index)
+        copies = copies.assign(Tweet_Content=[repost(text, rng) for text in copies['Tweet_Content']])
+        frame = pd.concat([part, copies]).sample(frac=1, random_state=seed + index)
+        frame['Tweet_Timestamp'] = frame['Tweet_Timestamp'].astype(str)
+        uploads.append(encode(frame, f"scrape_{index:03d}", FORMATS[index % len(FORMATS)]))
+    return tweets, uploads
+
+
+def run(uploads, workers, processes=False):
+    ingestion = ingest.Ingestion(uploads, workers=workers, processes=processes)
+    start = time.perf_counter()
+    frame = pd.concat(list(ingestion), ignore_index=True)
+    return frame, ingestion, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sequential vs concurrent multi-file ingestion")
+    parser.add_argument('--rows', type=int, default=200000, help="distinct tweets over all files")
+    parser.add_argument('--files', type=int, default=16)
+    parser.add_argument('--overlap', type=float, default=0.2, help="share of each file repeated from the others")
+    parser.add_argument('--workers', type=int, default=max(os.cpu_count() or 1, 4))
+    args = parser.parse_args()
+
+    tweets, uploads = make_uploads(args.rows, args.files, args.overlap)
+    megabytes = sum(len(data) for _, data in uploads) / 2 ** 20
+    distinct = len(pd.unique(ingest.near_duplicate_hashes(tweets['Tweet_Content'])))
+    print(f"{len(uploads)} files, {megabytes:.1f} MB compressed, {distinct:,} distinct tweets, "
+          f"{os.cpu_count()} CPUs")
+
+    expected, ingestion, sequential_time = run(uploads, workers=1)
+    print(f"{'sequential':<20} {sequential_time:8.2f}s  {ingestion.rows_read / sequential_time:10.0f} rows/s  "
+          f"{ingestion.duplicates_removed:,} near-duplicates removed")
+    assert len(expected) == distinct, (len(expected), distinct)
+
+    for label, processes in (('threads', False), ('processes', True)):
+        frame, ingestion, elapsed = run(uploads, args.workers, processes)
+        assert frame.equals(expected), f"{label} kept different rows"
+        print(f"{label + f' ({args.workers})':<20} {elapsed:8.2f}s  {ingestion.rows_read / elapsed:10.0f} rows/s  "
+              f"speedup x{sequential_time / elapsed:.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+# Per-call cost of the instrumentation hooks, recording and disabled, next to
+# the cost of a typical stage they wrap (scoring one chunk of tweets).
+# Run from the repository root: python -m benchmarks.bench_instrumentation
+import argparse
+import time
+
+import instrumentation
+import model_cache
+import scoring
+from benchmarks.synthetic import make_tweets
+
+
+def per_call_ns(recorder, calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        with recorder.stage('stage', rows=1):
+            pass
+        recorder.count('events')
+    return (time.perf_counter() - start) / calls * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Instrumentation overhead benchmark")
+    parser.add_argument('--calls', type=int, default=200000)
+    parser.add_argument('--rows', type=int, default=5000, help="rows in the reference scoring chunk")
+    args = parser.parse_args()
+
+    disabled = per_call_ns(instrumentation.NULL_RECORDER, args.calls)
+    enabled = per_call_ns(instrumentation.Recorder(), args.calls)
+    # The disabled recorder must not accumulate anything
+    assert not instrumentation.NULL_RECORDER.stages and not instrumentation.NULL_RECORDER.counters
+
+    texts = make_tweets(args.rows)['Tweet_Content']
+    analyzer = model_cache.get_vader_model()
+    start = time.perf_counter()
+    scoring.score_series(analyzer, texts)
+    chunk_ns = (time.perf_counter() - start) * 1e9
+
+    print(f"disabled  {disabled:8.0f} ns per stage + counter")
+    print(f"recording {enabled:8.0f} ns per stage + counter")
+    print(f"scoring a {args.rows:,}-row chunk takes {chunk_ns / 1e6:,.1f} ms, "
+          f"so recording adds {enabled / chunk_ns:.6%} per chunk")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+# Compare loading the pickled VADER model with loading the compact lexicon:
+# load time and memory added to a fresh process, plus a score identity check.
+# Run from the repository root:
+#   python lexicon.py export Models/vader_model.pkl /tmp/vader.vlex
+#   python -m benchmarks.bench_lexicon Models/vader_model.pkl /tmp/vader.vlex
+import argparse
+import json
+import subprocess
+import sys
+
+import lexicon
+
+# Runs in a fresh interpreter, so each load starts cold
+LOAD_SCRIPT = """
+import gc, json, pickle, resource, sys, time
+import lexicon
+path = sys.argv[1]
+gc.collect()
+before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+start = time.perf_counter()
+if path.endswith(lexicon.LEXICON_SUFFIX):
+    analyzer = lexicon.load_analyzer(path)
+else:
+    with open(path, 'rb') as model_file:
+        analyzer = pickle.load(model_file)
+elapsed = time.perf_counter() - start
+after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({'seconds': elapsed, 'rss_kb': after - before}))
+"""
+
+
+def measure(path, repeat):
+    runs = [json.loads(subprocess.run([sys.executable, '-c', LOAD_SCRIPT, path], capture_output=True, text=True,
+                                      check=True).stdout) for _ in range(repeat)]
+    return min(run['seconds'] for run in runs), min(run['rss_kb'] for run in runs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pickled model vs compact lexicon load benchmark")
+    parser.add_argument('model', help="pickled VADER model")
+    parser.add_argument('lexicon', nargs='?', help="lexicon file (default: the model path with a .vlex suffix)")
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    path = args.lexicon or lexicon.lexicon_path_for(args.model)
+
+    for name, source in (('pickle', args.model), ('lexicon', path)):
+        seconds, rss_kb = measure(source, args.repeat)
+        print(f"{name:<8} load {seconds * 1000:7.2f} ms   +{rss_kb / 1024:6.2f} MB RSS")
+
+    problems = lexicon.verify(args.model, path, lexicon.sample_texts(lexicon.load_analyzer(path)))
+    print("scores identical" if not problems else '; '.join(problems))
+
+
+if __name__ == '__main__':
+    main()
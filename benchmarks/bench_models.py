@@ -0,0 +1,47 @@
+# Throughput and latency of each selectable sentiment model on synthetic tweets.
+# Models whose files or packages are missing are reported and skipped.
+# Run from the repository root: python -m benchmarks.bench_models --rows 20000
+import argparse
+import pickle
+import time
+
+import models
+from benchmarks.synthetic import make_tweets
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-model scoring benchmark")
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--models', nargs='+', choices=list(models.MODEL_SPECS), default=list(models.MODEL_SPECS))
+    parser.add_argument('--single', type=int, default=200, help="texts scored one at a time, for per-request latency")
+    args = parser.parse_args()
+
+    # Distinct texts, so deduplication doesn't flatter any model
+    texts = make_tweets(args.rows, rare_word_ratio=1.0)['Tweet_Content']
+
+    print(f"{'model':<32} {'load s':>8} {'texts/s':>10} {'batch ms/text':>14} {'single ms':>10} {'accuracy':>9}")
+    for name in args.models:
+        spec = models.MODEL_SPECS[name]
+        try:
+            start = time.perf_counter()
+            model = models.get_model(name)
+            load_seconds = time.perf_counter() - start
+        except (OSError, ImportError, pickle.UnpicklingError) as error:
+            print(f"{spec['title']:<32} skipped: {error}")
+            continue
+
+        start = time.perf_counter()
+        model.score_series(texts)
+        batch_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for text in texts[:args.single]:
+            model.analyze(text)
+        single_ms = (time.perf_counter() - start) / args.single * 1000
+
+        print(f"{spec['title']:<32} {load_seconds:8.2f} {args.rows / batch_seconds:10,.0f} "
+              f"{batch_seconds / args.rows * 1000:14.3f} {single_ms:10.2f} {spec['accuracy']:9.1%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+# Compare serial scoring against the process-pool mode.
+# Run from the repository root: python -m benchmarks.bench_parallel --rows 200000
+import argparse
+import time
+
+import model_cache
+import parallel
+import scoring
+import text_processing
+from benchmarks.synthetic import make_tweets
+
+CLEANERS = {
+    'none': None,
+    'tweet': text_processing.clean_tweet,
+    'preprocess': text_processing.preprocess_text,
+}
+
+
+def run_serial(texts, model_path, cleaner):
+    analyzer = model_cache.load_vader_model(model_path)
+    if cleaner is not None:
+        texts = texts.apply(cleaner)
+    return scoring.score_series(analyzer, texts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serial vs process-pool scoring benchmark")
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--workers', type=int, nargs='+', default=[2, 4, parallel.default_workers()])
+    parser.add_argument('--clean', choices=sorted(CLEANERS), default='preprocess')
+    parser.add_argument('--model', default=None,
+                        help='pickled VADER model (defaults to a stock SentimentIntensityAnalyzer)')
+    args = parser.parse_args()
+
+    texts = make_tweets(args.rows)['Tweet_Content']
+    cleaner = CLEANERS[args.clean]
+
+    start = time.perf_counter()
+    expected = run_serial(texts, args.model, cleaner)
+    serial_time = time.perf_counter() - start
+    print(f"serial      {serial_time:8.2f}s  {args.rows / serial_time:10.0f} rows/s")
+
+    for workers in sorted(set(args.workers)):
+        start = time.perf_counter()
+        result = parallel.score_series_parallel(texts, model_path=args.model, cleaner=cleaner,
+                                                workers=workers)
+        elapsed = time.perf_counter() - start
+        assert (result['compound'].values == expected['compound'].values).all(), 'results out of order'
+        print(f"workers={workers:<3} {elapsed:8.2f}s  {args.rows / elapsed:10.0f} rows/s  "
+              f"speedup x{serial_time / elapsed:.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+# Load test for server.py: concurrent /score (or /score/batch) requests against a local instance,
+# reporting requests per second and p50/p99 latency.
+# Start the service first (python server.py), then from the repository root:
+#   python -m benchmarks.bench_server --requests 20000 --concurrency 64
+import argparse
+import asyncio
+import json
+import time
+
+import numpy as np
+from tornado.httpclient import AsyncHTTPClient
+
+from benchmarks.synthetic import make_tweets
+
+
+async def worker(client, url, bodies, latencies):
+    while bodies:
+        body = bodies.pop()
+        start = time.perf_counter()
+        await client.fetch(url, method='POST', body=body, headers={'Content-Type': 'application/json'})
+        latencies.append(time.perf_counter() - start)
+
+
+async def run(args):
+    AsyncHTTPClient.configure(None, max_clients=args.concurrency)
+    client = AsyncHTTPClient()
+    texts = make_tweets(args.requests * args.batch_size)['Tweet_Content'].tolist()
+    if args.batch_size > 1:
+        url = args.url.rstrip('/') + '/score/batch'
+        bodies = [json.dumps({'texts': texts[i:i + args.batch_size]}) for i in range(0, len(texts), args.batch_size)]
+    else:
+        url = args.url.rstrip('/') + '/score'
+        bodies = [json.dumps({'text': text}) for text in texts]
+
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(client, url, bodies, latencies) for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies_ms = np.array(latencies) * 1000
+    print(f"{len(latencies):,} requests in {elapsed:.2f}s  {len(latencies) / elapsed:,.0f} req/s  "
+          f"{len(latencies) * args.batch_size / elapsed:,.0f} texts/s")
+    print(f"latency p50 {np.percentile(latencies_ms, 50):.2f} ms  p99 {np.percentile(latencies_ms, 99):.2f} ms  "
+          f"max {latencies_ms.max():.2f} ms")
+    health = await client.fetch(args.url.rstrip('/') + '/health')
+    print(f"server: {json.loads(health.body)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test for the local scoring service")
+    parser.add_argument('--url', default='http://127.0.0.1:8600')
+    parser.add_argument('--requests', type=int, default=10000)
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--batch-size', type=int, default=1, help="texts per request (> 1 uses /score/batch)")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == '__main__':
+    main()
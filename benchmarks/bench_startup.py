@@ -0,0 +1,41 @@
+# Time-to-first-render of the Streamlit app, measured headlessly with AppTest.
+# Each sample runs in a fresh interpreter so it includes cold imports.
+# Run from the repository root: python -m benchmarks.bench_startup --runs 3
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+SAMPLE = """
+import json, time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file('vader.py', default_timeout=120)
+app.run()
+first = time.perf_counter() - start
+start = time.perf_counter()
+app.run()
+rerun = time.perf_counter() - start
+print(json.dumps({'first_render': first, 'rerun': rerun, 'errors': [e.message for e in app.exception]}))
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Streamlit time-to-first-render benchmark")
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--offline', action='store_true', help='set OLYMPICS_OFFLINE=1 for the app')
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    if args.offline:
+        env['OLYMPICS_OFFLINE'] = '1'
+    for run in range(args.runs):
+        out = subprocess.run([sys.executable, '-c', SAMPLE], env=env, capture_output=True, text=True, check=True)
+        sample = json.loads(out.stdout.strip().splitlines()[-1])
+        print(f"run {run + 1}: first render {sample['first_render']:6.2f}s  rerun {sample['rerun']:6.2f}s"
+              + (f"  errors: {sample['errors']}" if sample['errors'] else ''))
+
+
+if __name__ == '__main__':
+    main()
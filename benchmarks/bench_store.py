@@ -0,0 +1,79 @@
+# Time appends to the tweet store and the dashboard's aggregate queries,
+# checking the stored aggregates against DashboardAggregates on the same rows.
+# Run from the repository root: python -m benchmarks.bench_store --rows 1000000
+import argparse
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+import scoring
+import store
+import streaming
+from benchmarks.synthetic import make_tweets
+from model_cache import load_vader_model
+
+
+# The columns preprocess_dataframe adds, without the NLTK preprocessing
+def scored_chunks(frame, analyzer, chunk_size):
+    for start in range(0, len(frame), chunk_size):
+        chunk = frame.iloc[start:start + chunk_size].copy()
+        chunk['Cleaned_Tweet'] = chunk['Tweet_Content'].str.lower()
+        chunk['date'] = chunk['Tweet_Timestamp'].dt.date
+        scores = scoring.score_series(analyzer, chunk['Cleaned_Tweet'])
+        chunk['sentiment'] = scores['label']
+        chunk['sentiment_score'] = scores['compound']
+        yield chunk
+
+
+def time_query(name, query, repeat=20):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = query()
+    elapsed = (time.perf_counter() - start) / repeat
+    print(f"{name:<32} {elapsed * 1000:8.2f} ms  ({len(result)} rows)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tweet store append and query benchmark")
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--uploads', type=int, default=2, help="split the rows into this many appended uploads")
+    parser.add_argument('--chunk-size', type=int, default=streaming.DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    analyzer = load_vader_model(None)
+    frame = make_tweets(args.rows, days=17)
+    chunks = list(scored_chunks(frame, analyzer, args.chunk_size))
+    expected = streaming.aggregate_chunks(chunks)
+
+    with tempfile.TemporaryDirectory() as directory:
+        tweet_store = store.TweetStore(os.path.join(directory, 'tweets.sqlite'))
+        per_upload = -(-len(chunks) // args.uploads)
+        for upload in range(args.uploads):
+            batch = chunks[upload * per_upload:(upload + 1) * per_upload]
+            start = time.perf_counter()
+            tweet_store.append(pd.concat(batch) if batch else frame.iloc[:0], f'upload-{upload}')
+            elapsed = time.perf_counter() - start
+            rows = sum(len(chunk) for chunk in batch)
+            print(f"append upload {upload:<18} {elapsed:8.2f} s   {rows / elapsed:10,.0f} rows/s")
+
+        first, last = tweet_store.date_range()
+        week_end = first + pd.Timedelta(days=6)
+        time_query("daily sentiment (all dates)", tweet_store.daily_sentiment)
+        time_query("tweet volume (one week)", lambda: tweet_store.tweet_volume(first, week_end))
+        time_query("daily sentiment (#paris2024)", lambda: tweet_store.daily_sentiment(hashtag='#paris2024'))
+        time_query("sentiment distribution", tweet_store.sentiment_distribution)
+        time_query("top hashtags (one week)", lambda: tweet_store.top_hashtags(10, first, week_end))
+        time_query("tweets (#gold, first 1000)", lambda: tweet_store.tweets(hashtag='#gold'))
+
+        stored = tweet_store.daily_sentiment()
+        assert (stored['date'] == expected.daily_sentiment()['date']).all()
+        assert ((stored['sentiment_score'] - expected.daily_sentiment()['sentiment_score']).abs() < 1e-9).all()
+        assert (tweet_store.tweet_volume()['count'] == expected.tweet_volume()['count']).all()
+        assert tweet_store.top_hashtags(6).to_dict() == expected.top_hashtags(6).to_dict()
+        print("stored aggregates match DashboardAggregates")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+# Tweets per second for the original preprocess_text against TextNormalizer.
+# Run from the repository root: python -m benchmarks.bench_text_processing --rows 20000
+import argparse
+import re
+import time
+
+import emoji
+from nltk.corpus import stopwords
+from nltk.stem import WordNetLemmatizer
+from nltk.tokenize import word_tokenize
+
+from benchmarks.synthetic import make_tweets
+from text_processing import TextNormalizer
+
+
+# preprocess_text as it was before TextNormalizer, kept as the baseline
+def legacy_preprocess_text(text):
+    if not isinstance(text, str):
+        return str(text)
+    text = text.lower()
+    text = re.sub(r'http\S+|www\S+|https\S+', '', text, flags=re.MULTILINE)
+    text = re.sub(r'\@\w+|\#', '', text)
+    text = emoji.demojize(text)
+    text = re.sub(r'[^\w\s]', '', text)
+    tokens = word_tokenize(text)
+    stop_words = set(stopwords.words('english'))
+    tokens = [word for word in tokens if word not in stop_words]
+    lemmatizer = WordNetLemmatizer()
+    tokens = [lemmatizer.lemmatize(word) for word in tokens]
+    return ' '.join(tokens)
+
+
+def time_it(label, func, texts):
+    start = time.perf_counter()
+    result = func(texts)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<12} {elapsed:8.2f}s  {len(texts) / elapsed:10.0f} tweets/s")
+    return result, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="preprocess_text microbenchmark")
+    parser.add_argument('--rows', type=int, default=20000)
+    args = parser.parse_args()
+
+    texts = make_tweets(args.rows)['Tweet_Content'].tolist()
+    normalizer = TextNormalizer()
+
+    before, legacy_time = time_it('before', lambda batch: [legacy_preprocess_text(t) for t in batch], texts)
+    after, new_time = time_it('after', normalizer.preprocess_batch, texts)
+    assert before == after, 'TextNormalizer output differs from the original preprocess_text'
+    print(f"speedup x{legacy_time / new_time:.2f}  lemma cache: {normalizer.lemma_cache_info()}")
+
+
+if __name__ == '__main__':
+    main()
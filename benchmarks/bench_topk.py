@@ -0,0 +1,93 @@
+# Exact vs fixed-memory approximate top hashtags and words on a long-tailed
+# corpus: time, peak memory and counters kept, and the recall of the
+# approximate top lists. tests/test_sketches.py checks the error bounds.
+# Run from the repository root: python -m benchmarks.bench_topk --rows 200000
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+import streaming
+from sketches import DEFAULT_ERROR
+
+TOP_N = {'hashtags': 10, 'words': 20}
+
+
+# Tweets of Zipf-distributed words and hashtags, so most distinct tokens occur only once or twice
+def long_tail_tweets(rows, seed=0, zipf=1.2):
+    rng = np.random.default_rng(seed)
+    lengths = rng.integers(6, 20, rows)
+    words = rng.zipf(zipf, lengths.sum())
+    hashtags = rng.zipf(zipf, rows)
+    texts = []
+    position = 0
+    for length, hashtag in zip(lengths, hashtags):
+        parts = [f"word{rank}" for rank in words[position:position + length]]
+        position += length
+        parts.append(f"#tag{hashtag}")
+        texts.append(' '.join(parts))
+    return pd.Series(texts)
+
+
+def build(texts, chunk_size, stop_words, sketch_error):
+    aggregates = streaming.DashboardAggregates(stop_words=stop_words, sketch_error=sketch_error)
+    for start in range(0, len(texts), chunk_size):
+        aggregates.update_tokens(texts[start:start + chunk_size])
+    return aggregates
+
+
+def tables(texts, chunk_size, stop_words, sketch_error):
+    aggregates = build(texts, chunk_size, stop_words, sketch_error)
+    return aggregates, {
+        'hashtags': aggregates.top_hashtags(TOP_N['hashtags']),
+        'words': aggregates.top_words(TOP_N['words']),
+        'cloud': aggregates.word_cloud_frequencies(),
+    }
+
+
+def measure(texts, chunk_size, stop_words, sketch_error):
+    start = time.perf_counter()
+    tables(texts, chunk_size, stop_words, sketch_error)
+    seconds = time.perf_counter() - start
+    # Memory is traced in a second run, as tracing slows the counting down
+    tracemalloc.start()
+    aggregates, result = tables(texts, chunk_size, stop_words, sketch_error)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return aggregates, result, seconds, peak
+
+
+# Share of the exact top n that is in the approximate top n
+def recall(exact_counts, top, n):
+    return len(set(top.index) & {item for item, _ in exact_counts.most_common(n)}) / n
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exact vs sketch-based top hashtags and words")
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--chunk-size', type=int, default=streaming.DEFAULT_CHUNK_SIZE)
+    parser.add_argument('--error', type=float, default=DEFAULT_ERROR, help="sketch error bound (share of tokens)")
+    args = parser.parse_args()
+
+    texts = long_tail_tweets(args.rows)
+    stop_words = {'the', 'and'}
+
+    exact, exact_tables, exact_seconds, exact_peak = measure(texts, args.chunk_size, stop_words, None)
+    approx, approx_tables, approx_seconds, approx_peak = measure(texts, args.chunk_size, stop_words, args.error)
+    exact_counts = {'hashtags': exact.tokens.hashtags(), 'words': exact.tokens.words(stop_words)}
+
+    print(f"{'mode':<8} {'seconds':>8} {'peak MB':>8} {'counters':>10}")
+    print(f"{'exact':<8} {exact_seconds:8.2f} {exact_peak / 2**20:8.1f} {len(exact.tokens):10,}")
+    print(f"{'sketch':<8} {approx_seconds:8.2f} {approx_peak / 2**20:8.1f} "
+          f"{sum(len(sketch) for sketch in approx.sketches.values()):10,}")
+
+    for name, n in TOP_N.items():
+        sketch = approx.sketches[name]
+        print(f"top {n} {name}: recall {recall(exact_counts[name], approx_tables[name], n):.0%}, "
+              f"max undercount {sketch.error:,} of {sketch.total:,} tokens ({sketch.error_ratio:.5%})")
+
+
+if __name__ == '__main__':
+    main()
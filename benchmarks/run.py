@@ -0,0 +1,304 @@
+# Reproducible benchmark of each pipeline stage on synthetic Olympics tweets.
+# Results are written as JSON so runs can be compared across commits.
+#
+# Run from the repository root:
+#   python -m benchmarks.run --rows 50000 --output bench.json
+#   python -m benchmarks.run --rows 50000 --compare bench.json
+#   python -m benchmarks.run --stages clean_tweet vader_scoring
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from collections import Counter
+from datetime import datetime, timezone
+
+import scoring
+import streaming
+from benchmarks.synthetic import make_tweets
+from model_cache import load_vader_model
+from text_processing import TextNormalizer
+
+# name -> setup(data) returning the zero-argument callable to time
+STAGES = {}
+
+
+def stage(name):
+    def register(setup):
+        STAGES[name] = setup
+        return setup
+    return register
+
+
+class BenchData:
+    # Inputs shared by the stages, built once per run outside the timed sections
+
+    def __init__(self, rows, seed, duplicate_ratio, model_path):
+        self.frame = make_tweets(rows, seed=seed, duplicate_ratio=duplicate_ratio, rare_word_ratio=0.3,
+                                 emoji_ratio=0.5, max_emoji=3)
+        self.texts = self.frame['Tweet_Content'].tolist()
+        self.normalizer = TextNormalizer()
+        try:
+            self.stop_words = self.normalizer.stop_words
+            self.stop_words_source = 'nltk'
+        except LookupError:
+            from wordcloud import STOPWORDS
+            self.stop_words = frozenset(STOPWORDS)
+            self.stop_words_source = 'wordcloud (NLTK stopwords not installed)'
+        self.cleaned = self.normalizer.clean_tweets(self.texts)
+        self.analyzer = load_vader_model(model_path)
+
+        # A frame in the shape preprocess_dataframe produces, for the aggregation stages
+        scores = scoring.score_series(self.analyzer, self.cleaned)
+        processed = self.frame.copy()
+        processed['date'] = processed['Tweet_Timestamp'].dt.date
+        processed['sentiment'] = scores['label']
+        processed['sentiment_score'] = scores['compound']
+        self.processed = processed
+        self.content = processed['Tweet_Content'].astype(str)
+
+    def aggregates(self):
+        return streaming.DashboardAggregates(stop_words=self.stop_words)
+
+
+@stage('clean_tweet')
+def _clean_tweet(data):
+    return lambda: data.normalizer.clean_tweets(data.texts)
+
+
+@stage('preprocess_text')
+def _preprocess_text(data):
+    # A fresh normalizer per run so the lemma cache starts cold each time
+    stop_words = data.normalizer.stop_words
+    return lambda: TextNormalizer(stop_words=stop_words).preprocess_batch(data.texts)
+
+
+@stage('vader_scoring')
+def _vader_scoring(data):
+    return lambda: scoring.score_series(data.analyzer, data.cleaned)
+
+
+@stage('daily_aggregation')
+def _daily_aggregation(data):
+    def run():
+        aggregates = data.aggregates()
+        aggregates.update_daily(data.processed)
+        aggregates.update_sentiment(data.processed)
+        return aggregates.daily_sentiment(), aggregates.tweet_volume()
+    return run
+
+
+# The separate full-corpus passes the dashboard used before the shared token counts
+def _legacy_token_tables(content, stop_words):
+    from wordcloud import WordCloud
+
+    hashtags = Counter()
+    for tweet in content:
+        hashtags.update(streaming.HASHTAG_PATTERN.findall(tweet.lower()))
+    text = ' '.join(content)
+    words = Counter(word for word in text.lower().split() if word not in stop_words and len(word) > 3)
+    return hashtags, words, WordCloud(collocations=False).process_text(text)
+
+
+@stage('token_frequencies')
+def _token_frequencies(data):
+    def run():
+        aggregates = data.aggregates()
+        aggregates.update_tokens(data.content)
+        return aggregates.top_hashtags(10), aggregates.top_words(20), aggregates.word_cloud_frequencies()
+    # The tables derived from the shared counts must match the separate passes exactly
+    aggregates = data.aggregates()
+    aggregates.update_tokens(data.content)
+    hashtags, words, cloud = _legacy_token_tables(data.content, data.stop_words)
+    assert aggregates.tokens.hashtags() == hashtags
+    assert aggregates.tokens.words(data.stop_words) == words
+    assert aggregates.word_cloud_frequencies() == cloud
+    return run
+
+
+@stage('token_frequencies_legacy')
+def _token_frequencies_legacy(data):
+    return lambda: _legacy_token_tables(data.content, data.stop_words)
+
+
+@stage('word_cloud_render')
+def _word_cloud_render(data):
+    from wordcloud import WordCloud
+
+    aggregates = data.aggregates()
+    aggregates.update_tokens(data.content)
+    frequencies = aggregates.word_cloud_frequencies()
+    return lambda: WordCloud(width=800, height=400, background_color='white',
+                             colormap="Dark2").generate_from_frequencies(frequencies)
+
+
+# All six dashboard charts, as the Dashboard tab renders them
+def _render_dashboard_charts(aggregates):
+    import charts
+
+    return [
+        charts.word_cloud(aggregates.word_cloud_frequencies()),
+        charts.bar_chart(aggregates.sentiment_distribution(), "Sentiment Distribution", "Sentiment", "Count",
+                         colormap="viridis"),
+        charts.line_chart(aggregates.daily_sentiment(), 'date', 'sentiment_score',
+                          "Average Sentiment Score Over Time", "Date", "Average Sentiment Score", color='#000080'),
+        charts.bar_chart(aggregates.top_hashtags(10), "Top 10 Hashtags", "Hashtag", "Count", colormap="Dark2",
+                         rotate=True),
+        charts.line_chart(aggregates.tweet_volume(), 'date', 'count', "Tweet Volume Over Time", "Date",
+                          "Number of Tweets", color='#FFD700'),
+        charts.bar_chart(aggregates.top_words(20), "Top 20 Most Common Words", "Word", "Frequency",
+                         colormap="Dark2", rotate=True, figsize=(12, 6)),
+    ]
+
+
+def _full_aggregates(data):
+    aggregates = data.aggregates()
+    aggregates.update(data.processed)
+    return aggregates
+
+
+@stage('dashboard_charts')
+def _dashboard_charts(data):
+    import charts
+
+    aggregates = _full_aggregates(data)
+
+    def run():
+        charts.get_chart_cache().clear()
+        return _render_dashboard_charts(aggregates)
+    return run
+
+
+@stage('dashboard_charts_cached')
+def _dashboard_charts_cached(data):
+    # A rerun with unchanged aggregates: every chart comes from the chart cache
+    aggregates = _full_aggregates(data)
+    _render_dashboard_charts(aggregates)
+    return lambda: _render_dashboard_charts(aggregates)
+
+
+@stage('lttb_downsample')
+def _lttb_downsample(data):
+    import numpy as np
+
+    import charts
+
+    # A year of per-minute points reduced to the plotted maximum
+    x = np.arange(525600, dtype=np.int64) * 60
+    y = np.sin(np.arange(len(x)) / 1440) + np.random.default_rng(0).normal(0, 0.1, len(x))
+    indices = charts.lttb_indices(x, y, charts.MAX_LINE_POINTS)
+    assert len(indices) == charts.MAX_LINE_POINTS and indices[0] == 0 and indices[-1] == len(x) - 1
+    assert np.all(np.diff(indices) > 0)
+    return lambda: charts.lttb_indices(x, y, charts.MAX_LINE_POINTS)
+
+
+def time_stage(func, repeat):
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        runs.append(time.perf_counter() - start)
+    return runs
+
+
+def git_revision():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'],
+                                    capture_output=True, text=True, check=True).stdout.strip())
+        return commit, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+
+
+def package_versions():
+    versions = {}
+    for name in ('pandas', 'numpy', 'nltk', 'emoji', 'wordcloud', 'vaderSentiment'):
+        try:
+            module = __import__(name)
+            versions[name] = getattr(module, '__version__', 'unknown')
+        except ImportError:
+            versions[name] = None
+    return versions
+
+
+def run_benchmarks(args):
+    data = BenchData(args.rows, args.seed, args.duplicate_ratio, args.model)
+    commit, dirty = git_revision()
+    report = {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'commit': commit,
+            'dirty': dirty,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'packages': package_versions(),
+            'rows': args.rows,
+            'seed': args.seed,
+            'duplicate_ratio': args.duplicate_ratio,
+            'repeat': args.repeat,
+            'stop_words': data.stop_words_source,
+        },
+        'stages': {},
+    }
+    for name in args.stages:
+        try:
+            func = STAGES[name](data)
+            func()  # warm-up, not timed
+        except LookupError as error:
+            # Missing NLTK data
+            report['stages'][name] = {'skipped': str(error).strip().splitlines()[0]}
+            print(f"{name:<22} skipped (missing NLTK data)", file=sys.stderr)
+            continue
+        runs = time_stage(func, args.repeat)
+        median = statistics.median(runs)
+        report['stages'][name] = {
+            'median_seconds': median,
+            'min_seconds': min(runs),
+            'runs': runs,
+            'rows_per_second': args.rows / median if median else None,
+        }
+        print(f"{name:<22} {median * 1000:10.1f} ms  {args.rows / median:12,.0f} rows/s", file=sys.stderr)
+    return report
+
+
+def compare(report, baseline):
+    print(f"\n{'stage':<22} {'baseline ms':>12} {'current ms':>12} {'change':>8}", file=sys.stderr)
+    for name, result in report['stages'].items():
+        before = baseline.get('stages', {}).get(name, {}).get('median_seconds')
+        after = result.get('median_seconds')
+        if before is None or after is None:
+            continue
+        print(f"{name:<22} {before * 1000:12.1f} {after * 1000:12.1f} {after / before - 1:+8.1%}", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-stage benchmark of the sentiment pipeline")
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--duplicate-ratio', type=float, default=0.3, help="share of retweet-style exact duplicates")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--stages', nargs='+', choices=list(STAGES), default=list(STAGES))
+    parser.add_argument('--model', default=None, help="pickled VADER model (default: stock analyzer)")
+    parser.add_argument('--output', help="write the JSON report here instead of stdout")
+    parser.add_argument('--compare', help="earlier JSON report to compare against")
+    args = parser.parse_args()
+
+    report = run_benchmarks(args)
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as baseline_file:
+            compare(report, json.load(baseline_file))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output_file:
+            json.dump(report, output_file, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == '__main__':
+    main()
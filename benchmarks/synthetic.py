@@ -0,0 +1,43 @@
+import random
+import string
+
+import pandas as pd
+
+WORDS = ['olympics', 'paris', 'gold', 'medal', 'athlete', 'final', 'race', 'team', 'record', 'win',
+         'lose', 'amazing', 'terrible', 'proud', 'ceremony', 'swimming', 'gymnastics', 'fans',
+         'crowd', 'history', 'disappointed', 'incredible', 'watch', 'tonight', 'great', 'sad']
+HASHTAGS = ['#Paris2024', '#Olympics', '#OpeningCeremony', '#TeamUSA', '#TeamKenya', '#Gold']
+MENTIONS = ['@Olympics', '@Paris2024', '@NBCOlympics', '@SimoneBiles']
+EMOJIS = ['🥇', '🔥', '😍', '😭', '👏', '🇫🇷', '🏅']
+
+
+def _rare_word(rng):
+    return ''.join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 10)))
+
+
+# Generate a DataFrame of synthetic Olympics-style tweets shaped like the dashboard upload.
+#   duplicate_ratio  share of tweets that are exact copies (retweets) of an earlier tweet
+#   rare_word_ratio  chance per tweet of adding a random word, giving a long vocabulary tail
+#   emoji_ratio      chance per tweet of adding between one and max_emoji emoji
+def make_tweets(n, seed=0, days=17, duplicate_ratio=0.0, rare_word_ratio=0.0, emoji_ratio=0.4, max_emoji=1):
+    rng = random.Random(seed)
+    tweets = []
+    for _ in range(n):
+        if tweets and rng.random() < duplicate_ratio:
+            tweets.append(rng.choice(tweets))
+            continue
+        parts = rng.choices(WORDS, k=rng.randint(6, 20))
+        if rng.random() < 0.6:
+            parts.append(rng.choice(HASHTAGS))
+        if rng.random() < 0.3:
+            parts.insert(0, rng.choice(MENTIONS))
+        if rng.random() < 0.2:
+            parts.append('https://t.co/' + ''.join(rng.choices('abcdefghijk0123456789', k=10)))
+        if rng.random() < emoji_ratio:
+            parts.extend(rng.choices(EMOJIS, k=rng.randint(1, max_emoji)))
+        if rng.random() < rare_word_ratio:
+            parts.insert(rng.randint(0, len(parts)), _rare_word(rng))
+        tweets.append(' '.join(parts))
+    timestamps = pd.Timestamp('2024-07-26') + pd.to_timedelta(
+        [rng.randint(0, days * 24 * 3600) for _ in range(n)], unit='s')
+    return pd.DataFrame({'Tweet_Content': tweets, 'Tweet_Timestamp': timestamps})
@@ -0,0 +1,146 @@
+# Dashboard charts rendered to PNG and memoized on the data that feeds them.
+#
+# Each chart is drawn once per distinct (settings, data) pair and kept in a
+# process-wide LRU, so reruns, tab switches and sessions showing the same
+# aggregates only send the cached image. Figures are built without pyplot and
+# closed as soon as they are saved, so none accumulate in the process.
+# Time series longer than MAX_LINE_POINTS are downsampled with LTTB
+# (Largest-Triangle-Three-Buckets), which keeps the peaks and troughs a
+# plain stride would drop.
+import hashlib
+import io
+
+import numpy as np
+import pandas as pd
+
+from result_cache import LRUCache
+
+DEFAULT_CHART_CACHE_SIZE = 64
+MAX_LINE_POINTS = 1000
+# Same output settings as st.pyplot
+DPI = 200
+
+_chart_cache = LRUCache(DEFAULT_CHART_CACHE_SIZE, name='Chart cache')
+
+
+def get_chart_cache():
+    return _chart_cache
+
+
+# Indices of at most threshold points of (x, y) chosen with LTTB; the first and last points are always kept
+def lttb_indices(x, y, threshold):
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    # threshold - 2 buckets over the points between the first and the last
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    indices = np.empty(threshold, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        next_end = edges[bucket + 2] if bucket + 2 < len(edges) else n
+        next_x, next_y = x[end:next_end].mean(), y[end:next_end].mean()
+        # Keep the point forming the largest triangle with the last kept point and the next bucket's average
+        areas = np.abs((x[previous] - next_x) * (y[start:end] - y[previous])
+                       - (x[previous] - x[start:end]) * (next_y - y[previous]))
+        previous = start + int(np.argmax(areas))
+        indices[bucket + 1] = previous
+    return indices
+
+
+def downsample(frame, x_column, y_column, max_points=MAX_LINE_POINTS):
+    if len(frame) <= max_points:
+        return frame
+    x = pd.to_datetime(pd.Series(frame[x_column])).astype('int64').to_numpy()
+    return frame.iloc[lttb_indices(x, frame[y_column].to_numpy(), max_points)]
+
+
+def data_key(data):
+    # Content hash of a Series, DataFrame or frequency dict
+    digest = hashlib.blake2b(digest_size=16)
+    if isinstance(data, dict):
+        for word, count in sorted(data.items()):
+            digest.update(f"{word}\t{count}\n".encode('utf-8'))
+    else:
+        digest.update(repr(list(getattr(data, 'columns', [getattr(data, 'name', None)]))).encode('utf-8'))
+        digest.update(pd.util.hash_pandas_object(data, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def _render(key, draw):
+    png = _chart_cache.get(key)
+    if png is None:
+        png = draw()
+        _chart_cache.put(key, png)
+    return png
+
+
+def _figure_png(fig):
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png', dpi=DPI, bbox_inches='tight')
+    fig.clear()
+    return buffer.getvalue()
+
+
+def _axes(figsize):
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=figsize)
+    return fig, fig.subplots()
+
+
+# Labels are set after plotting, as pandas replaces the x label with the index name
+def _label(ax, title, xlabel, ylabel, rotate):
+    ax.set_title(title)
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel(ylabel)
+    if rotate:
+        ax.tick_params(axis='x', labelrotation=45)
+
+
+# Bar chart of a Series (index on the x axis) as PNG bytes, or None for an empty Series
+def bar_chart(series, title, xlabel, ylabel, colormap=None, color=None, rotate=False, figsize=None):
+    if series.empty:
+        # pandas cannot plot a bar chart without any bars
+        return None
+
+    def draw():
+        fig, ax = _axes(figsize)
+        style = {'colormap': colormap} if color is None else {'color': color}
+        series.plot(kind='bar', ax=ax, **style)
+        _label(ax, title, xlabel, ylabel, rotate)
+        return _figure_png(fig)
+    options = ('bar', title, xlabel, ylabel, colormap, None if color is None else list(color), rotate, figsize)
+    return _render((repr(options), data_key(series)), draw)
+
+
+# Line chart of frame[y] over frame[x] as PNG bytes, downsampled to max_points
+def line_chart(frame, x, y, title, xlabel, ylabel, color=None, figsize=(12, 6), max_points=MAX_LINE_POINTS):
+    def draw():
+        points = downsample(frame, x, y, max_points)
+        fig, ax = _axes(figsize)
+        ax.plot(points[x], points[y], color=color)
+        _label(ax, title, xlabel, ylabel, rotate=True)
+        return _figure_png(fig)
+    options = ('line', x, y, title, xlabel, ylabel, color, figsize, max_points)
+    return _render((repr(options), data_key(frame[[x, y]])), draw)
+
+
+# Word cloud of a word -> frequency table as PNG bytes, or None for an empty table
+def word_cloud(frequencies, width=800, height=400, background_color='white', colormap='Dark2'):
+    if not frequencies:
+        # WordCloud raises ValueError without at least one word
+        return None
+
+    def draw():
+        from wordcloud import WordCloud
+
+        cloud = WordCloud(width=width, height=height, background_color=background_color, colormap=colormap)
+        buffer = io.BytesIO()
+        cloud.generate_from_frequencies(frequencies).to_image().save(buffer, format='PNG')
+        return buffer.getvalue()
+    options = ('word_cloud', width, height, background_color, colormap)
+    return _render((repr(options), data_key(frequencies)), draw)
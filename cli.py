@@ -0,0 +1,164 @@
+# Headless batch scorer sharing the app's cleaning and VADER scoring.
+#
+#   python cli.py tweets.csv -o scored.parquet --text-column Tweet_Content --workers 8
+#   cat tweets.txt | python cli.py - --format txt > scored.csv
+import argparse
+import os
+import sys
+import time
+
+import instrumentation
+import model_cache
+import models
+import parallel
+import pipeline
+import result_cache
+import streaming
+
+INPUT_FORMATS = ('csv', 'txt', 'jsonl')
+OUTPUT_FORMATS = ('csv', 'parquet')
+
+
+def guess_format(path, choices, default):
+    extension = os.path.splitext(path)[1].lstrip('.').lower()
+    if extension == 'json':
+        extension = 'jsonl'
+    return extension if extension in choices else default
+
+
+def read_chunks(path, input_format, chunk_size):
+    source = sys.stdin if path == '-' else path
+    if input_format == 'csv':
+        return streaming.iter_csv_chunks(source, chunksize=chunk_size)
+    if input_format == 'jsonl':
+        return streaming.iter_jsonl_chunks(source, chunksize=chunk_size)
+    if path == '-':
+        return streaming.iter_text_chunks(sys.stdin, chunksize=chunk_size)
+    return _iter_text_file(path, chunk_size)
+
+
+def _iter_text_file(path, chunk_size):
+    with open(path, 'rb') as text_file:
+        yield from streaming.iter_text_chunks(text_file, chunksize=chunk_size)
+
+
+class ChunkWriter:
+    # Appends scored chunks to a CSV or Parquet output without holding them all
+
+    def __init__(self, path, output_format):
+        self.path = path
+        self.output_format = output_format
+        self._parquet_writer = None
+        self._wrote_header = False
+
+    def write(self, chunk):
+        if self.output_format == 'parquet':
+            self._write_parquet(chunk)
+        else:
+            target = sys.stdout if self.path == '-' else self.path
+            chunk.to_csv(target, mode='w' if not self._wrote_header else 'a',
+                         header=not self._wrote_header, index=False)
+            self._wrote_header = True
+
+    def _write_parquet(self, chunk):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit("Parquet output requires pyarrow: pip install pyarrow")
+        if self._parquet_writer is None:
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            self._parquet_writer = pq.ParquetWriter(self.path, table.schema)
+        else:
+            # Later chunks are cast to the schema of the first one
+            table = pa.Table.from_pandas(chunk, schema=self._parquet_writer.schema, preserve_index=False)
+        self._parquet_writer.write_table(table)
+
+    def close(self):
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Score tweets with the Olympics VADER model.")
+    parser.add_argument('input', help="CSV, TXT or JSONL file, or '-' for stdin")
+    parser.add_argument('-o', '--output', default='-', help="output .csv or .parquet file (default: CSV on stdout)")
+    parser.add_argument('--format', choices=INPUT_FORMATS, help="input format (default: from the file extension, else csv)")
+    parser.add_argument('--output-format', choices=OUTPUT_FORMATS, help="output format (default: from the file extension)")
+    parser.add_argument('--text-column', default='Tweet_Content', help="column or JSON key holding the text (TXT input always uses 'Text')")
+    parser.add_argument('--clean', choices=sorted(pipeline.CLEANERS), default='none',
+                        help="'tweet' strips URLs and mentions, 'preprocess' applies the dashboard preprocessing")
+    parser.add_argument('--chunk-size', type=int, default=streaming.DEFAULT_CHUNK_SIZE)
+    parser.add_argument('--workers', type=int, default=1, help="worker processes (default: 1, score in-process)")
+    parser.add_argument('--model', default=model_cache.MODEL_PATH, help="pickled VADER model")
+    parser.add_argument('--model-type', choices=list(models.MODEL_SPECS), default='vader',
+                        help="sentiment model to score with (the non-VADER models ignore --workers and --model)")
+    parser.add_argument('--quiet', action='store_true', help="no per-chunk progress")
+    parser.add_argument('--metrics', help="write per-stage timings to this file (.prom for Prometheus text, else JSON)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    input_format = args.format or guess_format(args.input, INPUT_FORMATS, 'csv')
+    output_format = args.output_format or guess_format(args.output, OUTPUT_FORMATS, 'csv')
+    if output_format == 'parquet' and args.output == '-':
+        raise SystemExit("Parquet output needs a file path, use -o scored.parquet")
+    text_column = 'Text' if input_format == 'txt' else args.text_column
+
+    if args.model_type == 'vader':
+        analyzer = model_cache.get_vader_model(args.model)
+        model = None
+        score_cache = result_cache.get_score_cache(model_cache.get_model_version(args.model))
+    else:
+        analyzer = None
+        try:
+            model = models.get_model(args.model_type)
+        except (ImportError, LookupError) as error:
+            raise SystemExit(str(error))
+        score_cache = result_cache.get_score_cache(models.get_model_version(args.model_type))
+        if args.workers > 1:
+            print(f"--workers is ignored for {model.title}, scoring in-process", file=sys.stderr)
+            args.workers = 1
+    executor = parallel.make_pool(args.workers, args.model) if args.workers > 1 else None
+    writer = ChunkWriter(args.output, output_format)
+    recorder = instrumentation.Recorder(enabled=bool(args.metrics))
+
+    rows = 0
+    start = time.perf_counter()
+    try:
+        for chunk in recorder.iterate('read', read_chunks(args.input, input_format, args.chunk_size)):
+            if text_column not in chunk.columns:
+                raise SystemExit(f"Column {text_column!r} not found, available: {', '.join(map(str, chunk.columns))}")
+            with recorder.stage('score', rows=len(chunk)):
+                chunk = pipeline.score_frame(chunk, text_column, clean=args.clean, analyzer=analyzer,
+                                             workers=args.workers, model_path=args.model,
+                                             cache=score_cache, executor=executor, model=model)
+            with recorder.stage('write', rows=len(chunk)):
+                writer.write(chunk)
+            rows += len(chunk)
+            if not args.quiet:
+                elapsed = time.perf_counter() - start
+                print(f"{rows:,} rows  {elapsed:.1f}s  {rows / elapsed:,.0f} rows/s", file=sys.stderr)
+    finally:
+        writer.close()
+        if executor is not None:
+            executor.shutdown()
+
+    elapsed = time.perf_counter() - start
+    own_rss, workers_rss = instrumentation.peak_rss_mb()
+    print(f"Scored {rows:,} rows in {elapsed:.2f}s ({rows / elapsed if elapsed else 0:,.0f} rows/s)", file=sys.stderr)
+    if own_rss is not None:
+        print(f"Peak RSS {own_rss:,.0f} MB" + (f", workers {workers_rss:,.0f} MB" if args.workers > 1 else ''),
+              file=sys.stderr)
+    if model is not None:
+        print(f"{model.title}: {model.stats.summary()}", file=sys.stderr)
+    print(score_cache.summary(), file=sys.stderr)
+    if args.metrics:
+        recorder.count('score_cache_hits', score_cache.hits)
+        recorder.count('score_cache_misses', score_cache.misses)
+        instrumentation.write_metrics(recorder, args.metrics)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,272 @@
+# Reading the Dashboard's uploads: any number of CSV exports, plain, gzipped
+# or zipped, and Parquet files. With several files they are decompressed and
+# parsed concurrently in a thread pool (zlib and pandas' parsers release the
+# GIL for most of the work) or, for CPU-bound parsing, a process pool; a single
+# file is streamed in chunks instead, so it never has to fit in memory.
+# Tweets that an earlier file already had (overlapping scrapes, retweets of the
+# same text) are dropped by hashing their normalized text; the tweets within
+# one file are all kept. The remaining rows are yielded in chunks ready for
+# pipeline.preprocess_dataframe.
+import gzip
+import io
+import os
+import re
+import struct
+import zipfile
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from streaming import DEFAULT_CHUNK_SIZE, iter_csv_chunks
+
+TEXT_COLUMN = 'Tweet_Content'
+# Extensions the Dashboard's uploader accepts (a .gz is a gzipped CSV)
+UPLOAD_TYPES = ['csv', 'gz', 'zip', 'parquet']
+# Removed before hashing: a retweet prefix, URLs, mentions, whitespace, punctuation and emoji variation
+# selectors. Letters, digits and emoji are kept, as they change a tweet's sentiment. '@' is left to the
+# mention alternative.
+NEAR_DUPLICATE_PATTERN = re.compile(r'^rt\b|(?:https?://|www\.)\S+|@\w+|@'
+                                    r'|[\s!-/:-?\[-`{-~\u00a1-\u00bf\u2010-\u2027\u2030-\u205e\u3000-\u303f\ufe0e\ufe0f]+')
+# Hash of a tweet with nothing left after normalization (empty, only a link or mention): never a duplicate
+NO_HASH = 0
+
+# One file to parse: a whole upload, or member of the zip archive in data.
+# size is its uncompressed size in bytes (as far as known), for progress.
+Part = namedtuple('Part', ['name', 'data', 'member', 'kind', 'size'])
+
+
+def file_kind(name):
+    name = name.lower()
+    if name.endswith('.parquet'):
+        return 'parquet'
+    if name.endswith('.gz'):
+        return 'csv.gz'
+    if name.endswith('.zip'):
+        return 'zip'
+    if name.endswith('.csv'):
+        return 'csv'
+    return None
+
+
+# The files to parse in (name, bytes) uploads, with zip archives expanded into their members
+def expand(files):
+    parts = []
+    for name, data in files:
+        kind = file_kind(name)
+        if kind == 'zip':
+            try:
+                archive = zipfile.ZipFile(io.BytesIO(data))
+            except zipfile.BadZipFile:
+                raise ValueError(f"{name} is not a zip archive") from None
+            with archive:
+                for info in archive.infolist():
+                    member_kind = file_kind(info.filename)
+                    if info.is_dir() or info.filename.startswith('__MACOSX/') or member_kind in (None, 'zip'):
+                        continue
+                    parts.append(Part(f"{name}/{info.filename}", data, info.filename, member_kind,
+                                      info.file_size))
+        elif kind is not None:
+            parts.append(Part(name, data, None, kind, _uncompressed_size(kind, data)))
+        else:
+            raise ValueError(f"Unsupported file type: {name}")
+    return parts
+
+
+def _uncompressed_size(kind, data):
+    # A gzip file ends with its uncompressed size modulo 2**32
+    if kind == 'csv.gz' and len(data) >= 4:
+        return max(struct.unpack('<I', data[-4:])[0], len(data))
+    return len(data)
+
+
+def _open(part):
+    # (binary stream of the part's uncompressed content, position in 0..part.size)
+    raw = io.BytesIO(part.data)
+    if part.member is None:
+        stream = raw
+        position = lambda: raw.tell() * part.size // max(len(part.data), 1)
+    else:
+        # A zip member's position is already in uncompressed bytes
+        stream = zipfile.ZipFile(raw).open(part.member)
+        position = stream.tell
+    if part.kind == 'csv.gz':
+        stream = gzip.GzipFile(fileobj=stream)
+    return stream, position
+
+
+def _read_parquet(stream):
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Parquet uploads require pyarrow: pip install pyarrow") from None
+    return pq.ParquetFile(stream)
+
+
+def _check_columns(part, frame):
+    if TEXT_COLUMN not in frame.columns:
+        raise ValueError(f"{part.name} has no {TEXT_COLUMN} column")
+    return frame
+
+
+# Stream one part in chunks of at most chunk_size rows; progress(bytes) is called as each chunk is read
+def iter_part_chunks(part, chunk_size=DEFAULT_CHUNK_SIZE, progress=None, first_chunksize=None):
+    stream, position = _open(part)
+    if part.kind == 'parquet':
+        parquet = _read_parquet(stream)
+        rows = 0
+        for batch in parquet.iter_batches(batch_size=chunk_size):
+            rows += batch.num_rows
+            if progress is not None:
+                progress(part.size * rows // max(parquet.metadata.num_rows, 1))
+            yield _check_columns(part, batch.to_pandas())
+        return
+    chunks = iter_csv_chunks(stream, chunksize=chunk_size, first_chunksize=first_chunksize)
+    try:
+        for chunk in chunks:
+            if progress is not None:
+                progress(min(position(), part.size))
+            yield _check_columns(part, chunk)
+    finally:
+        chunks.close()
+
+
+# Parse a whole part, with the near-duplicate hashes of its tweets (or None); runs in a pool worker
+def load_part(part, deduplicate=True):
+    stream, _ = _open(part)
+    if part.kind == 'parquet':
+        frame = _read_parquet(stream).read().to_pandas()
+    else:
+        frame = pd.read_csv(stream)
+    _check_columns(part, frame)
+    return frame, near_duplicate_hashes(frame[TEXT_COLUMN]) if deduplicate else None
+
+
+# 64-bit hash per tweet of its text without case, spacing, punctuation, URLs, mentions or a retweet prefix
+# (NO_HASH for a tweet with nothing else)
+def near_duplicate_hashes(texts):
+    normalized = texts.fillna('').astype(str).str.lower().str.replace(NEAR_DUPLICATE_PATTERN, '', regex=True)
+    hashes = pd.util.hash_pandas_object(normalized, index=False).to_numpy()
+    hashes[(normalized == '').to_numpy()] = NO_HASH
+    return hashes
+
+
+class NearDuplicateFilter:
+    # Drops the tweets whose near-duplicate hash occurred in an earlier file,
+    # given the chunks of one file after the other with end_file() in between.
+    # Repeats within a file are kept, as they are part of that file's tweets.
+    # Seen hashes are a sorted array: 8 bytes per distinct tweet.
+
+    def __init__(self):
+        self.seen = np.empty(0, dtype=np.uint64)
+        self.removed = 0
+        self._file_hashes = []
+
+    def filter(self, frame, hashes):
+        comparable = hashes != NO_HASH
+        keep = ~comparable | ~np.isin(hashes, self.seen)
+        self._file_hashes.append(hashes[comparable])
+        self.removed += len(frame) - int(keep.sum())
+        return frame[keep]
+
+    def end_file(self):
+        if self._file_hashes:
+            self.seen = np.union1d(self.seen, np.concatenate(self._file_hashes))
+            self._file_hashes = []
+
+
+class Ingestion:
+    # The rows of a set of (name, bytes) uploads as chunks of at most chunk_size
+    # rows (the first of at most first_chunksize), in upload order. With
+    # workers > 1 and several files, up to 2 * workers files are parsed ahead in
+    # a thread (or, with processes=True, process) pool. tell() and size are the
+    # bytes of the uploads read so far, for progress. With deduplicate, tweets
+    # found in an earlier file are dropped (a single file is passed through whole).
+
+    def __init__(self, files, chunk_size=DEFAULT_CHUNK_SIZE, workers=None, deduplicate=True, processes=False,
+                 first_chunksize=None):
+        self.parts = expand(files)
+        self.chunk_size = chunk_size
+        self.first_chunksize = first_chunksize or chunk_size
+        self.workers = workers if workers is not None else min(len(self.parts), os.cpu_count() or 1)
+        self.processes = processes
+        self.duplicates = NearDuplicateFilter() if deduplicate and len(self.parts) > 1 else None
+        self.size = sum(part.size for part in self.parts)
+        self.rows_read = 0
+        self._done_bytes = 0
+        self._part_bytes = 0
+
+    def tell(self):
+        return self._done_bytes + self._part_bytes
+
+    @property
+    def duplicates_removed(self):
+        return self.duplicates.removed if self.duplicates is not None else 0
+
+    def __iter__(self):
+        if self.workers > 1 and len(self.parts) > 1:
+            frames = self._load_concurrently()
+        else:
+            frames = self._stream()
+        size = self.first_chunksize
+        for frame, frame_bytes in frames:
+            start = 0
+            while start < len(frame):
+                end = start + size
+                if frame_bytes is not None:
+                    # A whole parsed file counts as read chunk by chunk
+                    self._part_bytes = frame_bytes * min(end, len(frame)) // len(frame)
+                # Copies, as preprocessing adds columns to each chunk
+                yield frame.iloc[start:end].copy()
+                start = end
+                size = self.chunk_size
+            if frame_bytes is not None:
+                self._done_bytes += frame_bytes
+                self._part_bytes = 0
+
+    def _set_part_bytes(self, position):
+        self._part_bytes = position
+
+    def _filter(self, frame, hashes):
+        # A chunk or the whole of the current file, without the tweets of earlier files
+        self.rows_read += len(frame)
+        return self.duplicates.filter(frame, hashes) if self.duplicates is not None else frame
+
+    def _end_file(self):
+        if self.duplicates is not None:
+            self.duplicates.end_file()
+
+    def _stream(self):
+        for part in self.parts:
+            for chunk in iter_part_chunks(part, self.chunk_size, progress=self._set_part_bytes,
+                                          first_chunksize=self.first_chunksize):
+                hashes = near_duplicate_hashes(chunk[TEXT_COLUMN]) if self.duplicates is not None else None
+                yield self._filter(chunk, hashes), None
+            self._end_file()
+            self._done_bytes += part.size
+            self._part_bytes = 0
+
+    def _load_concurrently(self):
+        pool_class = ProcessPoolExecutor if self.processes else ThreadPoolExecutor
+        with pool_class(max_workers=self.workers) as pool:
+            # A bounded window of files in flight keeps memory in check; results are taken in order
+            pending = []
+            parts = iter(self.parts)
+            deduplicate = self.duplicates is not None
+            for part in parts:
+                pending.append((part, pool.submit(load_part, part, deduplicate)))
+                if len(pending) >= 2 * self.workers:
+                    break
+            try:
+                while pending:
+                    part, future = pending.pop(0)
+                    frame, hashes = future.result()
+                    next_part = next(parts, None)
+                    if next_part is not None:
+                        pending.append((next_part, pool.submit(load_part, next_part, deduplicate)))
+                    yield self._filter(frame, hashes), part.size
+                    self._end_file()
+            finally:
+                for _, future in pending:
+                    future.cancel()
@@ -0,0 +1,216 @@
+# Lightweight timing and counters for the Analyzer, Dashboard and CLI flows.
+#
+#   recorder = Recorder()
+#   chunks = recorder.iterate('read_csv', pd.read_csv(path, chunksize=50000))
+#   for chunk in chunks:
+#       with recorder.stage('vader_scoring', rows=len(chunk)):
+#           ...
+#   recorder.to_json() / recorder.to_prometheus()
+#
+# A disabled recorder (NULL_RECORDER) hands back shared no-op objects and the
+# original iterables and functions, so leaving the calls in costs next to nothing.
+import json
+import sys
+import time
+
+
+# Peak resident set size in MB of this process and of its (finished) child processes
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None, None
+    # ru_maxrss is reported in kilobytes on Linux and in bytes on macOS
+    scale = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale
+    return own, children
+
+
+class StageStats:
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.0
+        self.rows = 0
+        self.peak_rss_mb = None
+
+    def as_dict(self):
+        return {
+            'calls': self.calls,
+            'seconds': self.seconds,
+            'rows': self.rows,
+            'rows_per_second': self.rows / self.seconds if self.rows and self.seconds else None,
+            'peak_rss_mb': self.peak_rss_mb,
+        }
+
+
+class _StageTimer:
+    def __init__(self, recorder, name, rows):
+        self.recorder = recorder
+        self.name = name
+        self.rows = rows
+
+    def add_rows(self, rows):
+        self.rows += rows
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.recorder.record(self.name, time.perf_counter() - self.start, self.rows)
+        return False
+
+
+class _NullStage:
+    def add_rows(self, rows):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class Recorder:
+    # Per-stage wall time, rows and peak memory, plus named counters.
+    # Meant for one flow at a time (a script run or a CLI invocation).
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.stages = {}
+        self.counters = {}
+        self._lap_start = None
+
+    def stage(self, name, rows=0):
+        if not self.enabled:
+            return _NULL_STAGE
+        return _StageTimer(self, name, rows)
+
+    def record(self, name, seconds, rows=0):
+        stats = self.stages.get(name)
+        if stats is None:
+            stats = self.stages[name] = StageStats()
+        stats.calls += 1
+        stats.seconds += seconds
+        stats.rows += rows
+        own_rss, _ = peak_rss_mb()
+        if own_rss is not None:
+            stats.peak_rss_mb = max(stats.peak_rss_mb or 0.0, own_rss)
+
+    def merge(self, other):
+        # Add the stages and counters of another recorder, e.g. one a background job filled in
+        if not self.enabled:
+            return self
+        for name, other_stats in other.stages.items():
+            stats = self.stages.get(name)
+            if stats is None:
+                stats = self.stages[name] = StageStats()
+            stats.calls += other_stats.calls
+            stats.seconds += other_stats.seconds
+            stats.rows += other_stats.rows
+            if other_stats.peak_rss_mb is not None:
+                stats.peak_rss_mb = max(stats.peak_rss_mb or 0.0, other_stats.peak_rss_mb)
+        for name, value in other.counters.items():
+            self.counters[name] = self.counters.get(name, 0) + value
+        return self
+
+    def count(self, name, value=1):
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def iterate(self, name, iterable):
+        # Time producing each item of a lazy iterable (e.g. CSV chunks), counting its rows
+        if not self.enabled:
+            return iterable
+        return self._timed_iter(name, iterable)
+
+    def _timed_iter(self, name, iterable):
+        iterator = iter(iterable)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            self.record(name, time.perf_counter() - start, len(item) if hasattr(item, '__len__') else 0)
+            yield item
+
+    def timed(self, name, func):
+        # Wrap func so each call is a stage, counting rows as the length of its first argument
+        if not self.enabled:
+            return func
+
+        def timed_func(*args, **kwargs):
+            with self.stage(name, rows=len(args[0]) if args and hasattr(args[0], '__len__') else 0):
+                return func(*args, **kwargs)
+        return timed_func
+
+    def start_laps(self):
+        if self.enabled:
+            self._lap_start = time.perf_counter()
+
+    def lap(self, name, rows=0):
+        # Record the time since the previous lap (or start_laps) as one call of stage name
+        if not self.enabled or self._lap_start is None:
+            return
+        now = time.perf_counter()
+        self.record(name, now - self._lap_start, rows)
+        self._lap_start = now
+
+    def snapshot(self):
+        own_rss, children_rss = peak_rss_mb()
+        return {
+            'stages': {name: stats.as_dict() for name, stats in self.stages.items()},
+            'counters': dict(self.counters),
+            'peak_rss_mb': own_rss,
+            'peak_children_rss_mb': children_rss,
+        }
+
+    def to_json(self, indent=2):
+        return json.dumps(self.snapshot(), indent=indent)
+
+    def to_prometheus(self, prefix='olympics'):
+        snapshot = self.snapshot()
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} {kind}")
+            for labels, value in samples:
+                lines.append(f"{prefix}_{name}{labels} {value}")
+
+        stages = snapshot['stages']
+        metric('stage_seconds_total', 'counter', "Wall time spent in each stage",
+               [(f'{{stage="{name}"}}', stats['seconds']) for name, stats in stages.items()])
+        metric('stage_calls_total', 'counter', "Number of times each stage ran",
+               [(f'{{stage="{name}"}}', stats['calls']) for name, stats in stages.items()])
+        metric('stage_rows_total', 'counter', "Rows processed by each stage",
+               [(f'{{stage="{name}"}}', stats['rows']) for name, stats in stages.items()])
+        if snapshot['counters']:
+            metric('events_total', 'counter', "Named event counters",
+                   [(f'{{name="{name}"}}', value) for name, value in snapshot['counters'].items()])
+        if snapshot['peak_rss_mb'] is not None:
+            metric('peak_rss_bytes', 'gauge', "Peak resident set size of this process",
+                   [('', int(snapshot['peak_rss_mb'] * 1024 * 1024))])
+        return '\n'.join(lines) + '\n'
+
+    def frame(self):
+        import pandas as pd
+
+        rows = [{'stage': name, **stats.as_dict()} for name, stats in self.stages.items()]
+        return pd.DataFrame(rows, columns=['stage', 'calls', 'seconds', 'rows', 'rows_per_second', 'peak_rss_mb'])
+
+
+NULL_RECORDER = Recorder(enabled=False)
+
+
+def write_metrics(recorder, path):
+    # Prometheus text for .prom/.txt paths, JSON otherwise
+    text = recorder.to_prometheus() if path.endswith(('.prom', '.txt')) else recorder.to_json()
+    with open(path, 'w', encoding='utf-8') as metrics_file:
+        metrics_file.write(text)
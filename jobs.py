@@ -0,0 +1,175 @@
+# Background processing of large uploads. A job reads, preprocesses and scores
+# a file chunk by chunk on a daemon thread and folds every finished chunk into
+# running results (e.g. streaming.DashboardAggregates), so the page can show
+# progress and partial results while it runs and the user can cancel it.
+# Jobs are process-wide and keyed like the file cache: a session that reloads
+# or times out picks up the same job instead of starting over.
+import logging
+import threading
+import time
+from collections import namedtuple
+
+from instrumentation import NULL_RECORDER
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POLL_SECONDS = 1
+MAX_FINISHED_JOBS = 8
+
+RUNNING, DONE, CANCELLED, FAILED = 'running', 'done', 'cancelled', 'failed'
+
+# fraction is the share of the file read so far; estimated_rows, eta_seconds are None until it is known
+Progress = namedtuple('Progress', ['rows', 'fraction', 'rows_per_second', 'estimated_rows', 'eta_seconds'])
+
+
+def format_seconds(seconds):
+    minutes, seconds = divmod(int(round(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
+
+
+def progress_text(progress):
+    parts = [f"{progress.rows:,} rows"]
+    if progress.estimated_rows is not None:
+        parts[0] += f" of ~{progress.estimated_rows:,}"
+    if progress.rows_per_second:
+        parts.append(f"{progress.rows_per_second:,.0f} rows/s")
+    if progress.eta_seconds is not None:
+        parts.append(f"ETA {format_seconds(progress.eta_seconds)}")
+    return ' · '.join(parts)
+
+
+class BackgroundJob:
+    # chunks is a lazy iterable of processed chunks (e.g. a generator chain from
+    # the file reader through preprocessing), consumed on the worker thread; each
+    # chunk is folded in with result.update(chunk). source is the file the chunks
+    # are read from, or anything with tell() given its size: the position read
+    # so far gives the progress.
+    # Folding is timed as stage on recorder, which the job's chunks may also use.
+    # Cancelling stops the job between chunks and keeps the partial results.
+
+    def __init__(self, chunks, result, source=None, size=None, recorder=NULL_RECORDER, stage='update',
+                 on_done=None):
+        self.chunks = chunks
+        self.result = result
+        self.source = source
+        self.recorder = recorder
+        self.stage = stage
+        self.on_done = on_done
+        self.size = size
+        if source is not None and size is None:
+            # The chunk reader may already have read ahead, so the position is kept
+            position = source.tell()
+            self.size = source.seek(0, 2)
+            source.seek(position)
+        self.state = RUNNING
+        self.error = None
+        self.rows = 0
+        self.chunks_done = 0
+        # Bytes of source read when the last chunk was folded in
+        self.position = 0
+        self.started = None
+        self.finished = None
+        self._cancel = threading.Event()
+        # Held while a chunk is folded in, so readers never see a half-updated result
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self.state == RUNNING
+
+    def start(self):
+        self.started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name='background-job', daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        try:
+            for chunk in self.chunks:
+                with self._lock, self.recorder.stage(self.stage, rows=len(chunk)):
+                    self.result.update(chunk)
+                    self.rows += len(chunk)
+                    self.chunks_done += 1
+                    if self.source is not None:
+                        self.position = self.source.tell()
+                if self._cancel.is_set():
+                    break
+        except Exception as error:
+            logger.exception("Background job failed after %d rows", self.rows)
+            self.error = error
+        finally:
+            # Let the chunk pipeline clean up (e.g. roll back a partial store upload)
+            if hasattr(self.chunks, 'close'):
+                self.chunks.close()
+        self.finished = time.perf_counter()
+        if self.error is not None:
+            self.state = FAILED
+        elif self._cancel.is_set():
+            self.state = CANCELLED
+        else:
+            self.state = DONE
+            if self.on_done is not None:
+                self.on_done(self.result)
+        logger.info("Background job %s: %d rows in %.1fs", self.state, self.rows, self.finished - self.started)
+
+    def cancel(self):
+        self._cancel.set()
+
+    def wait(self, timeout=None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return not self.running
+
+    def read(self, func):
+        # func(result) while no chunk is being folded in, e.g. to copy the chart tables
+        with self._lock:
+            return func(self.result)
+
+    def progress(self):
+        elapsed = (self.finished or time.perf_counter()) - self.started if self.started else 0.0
+        rows_per_second = self.rows / elapsed if elapsed > 0 else 0.0
+        if self.state == DONE:
+            fraction = 1.0
+        elif self.size:
+            fraction = min(self.position / self.size, 1.0)
+        else:
+            fraction = 0.0
+        estimated_rows = eta_seconds = None
+        if self.running and self.rows and fraction > 0:
+            # Rows and time left are extrapolated from the bytes read so far
+            estimated_rows = max(int(self.rows / fraction), self.rows)
+            eta_seconds = elapsed * (1 - fraction) / fraction
+        return Progress(self.rows, fraction, rows_per_second, estimated_rows, eta_seconds)
+
+
+_jobs = {}
+_jobs_lock = threading.Lock()
+
+
+def get_job(key):
+    with _jobs_lock:
+        return _jobs.get(key)
+
+
+# Start job under key unless a running or finished job already has it; returns the job in charge.
+# A cancelled or failed job is replaced.
+def submit(key, job):
+    with _jobs_lock:
+        existing = _jobs.get(key)
+        if existing is not None and existing.state in (RUNNING, DONE):
+            return existing
+        _jobs[key] = job.start()
+        # Finished jobs only hold on to their results for sessions still showing them
+        finished = [name for name, other in _jobs.items() if not other.running]
+        for name in finished[:max(len(finished) - MAX_FINISHED_JOBS, 0)]:
+            del _jobs[name]
+        return job
+
+
+def forget(key):
+    with _jobs_lock:
+        job = _jobs.pop(key, None)
+    if job is not None:
+        job.cancel()
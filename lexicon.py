@@ -0,0 +1,204 @@
+# Compact binary VADER lexicon, a faster and smaller alternative to loading the
+# pickled SentimentIntensityAnalyzer.
+#
+#   python lexicon.py export Models/vader_model.pkl      # writes Models/vader_model.vlex
+#   python lexicon.py verify Models/vader_model.pkl
+#
+# Once exported, model_cache.load_vader_model() builds the analyzer from the
+# .vlex file next to the pickle whenever its recorded source digest still
+# matches the pickle, and falls back to unpickling otherwise.
+#
+# Layout (little-endian): a fixed header, the lexicon values as one float32 array
+# in sorted-word order, then the sorted words, the emoji and their descriptions as
+# newline-separated UTF-8 blocks. The file is memory-mapped when read, so the
+# raw lexicon text the pickle carries is never loaded.
+import argparse
+import hashlib
+import mmap
+import os
+import pickle
+import struct
+import sys
+
+import numpy as np
+from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+
+MAGIC = b'VLEX'
+FORMAT_VERSION = 1
+LEXICON_SUFFIX = '.vlex'
+# magic, format version, value bytes, value decimals, words, emoji, source digest,
+# byte lengths of the words, emoji and descriptions blocks
+HEADER = struct.Struct('<4sHBBII64sQQQ')
+# Values are stored as float32 and rounded back to this many decimals on load;
+# lexicons that don't round-trip exactly are stored as float64 instead
+VALUE_DECIMALS = 4
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as source:
+        for block in iter(lambda: source.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def lexicon_path_for(model_path):
+    return os.path.splitext(model_path)[0] + LEXICON_SUFFIX
+
+
+def _join(strings):
+    strings = list(strings)
+    if any('\n' in string for string in strings):
+        raise ValueError("Lexicon entries must not contain newlines")
+    return '\n'.join(strings).encode('utf-8')
+
+
+def _split(block):
+    return block.decode('utf-8').split('\n') if block else []
+
+
+def export_lexicon(analyzer, path, source_digest=''):
+    words = sorted(analyzer.lexicon)
+    values = np.array([analyzer.lexicon[word] for word in words], dtype=np.float64)
+    if np.array_equal(np.round(values.astype(np.float32).astype(np.float64), VALUE_DECIMALS), values):
+        values, decimals = values.astype('<f4'), VALUE_DECIMALS
+    else:
+        values, decimals = values.astype('<f8'), 0
+    emoji = list(analyzer.emojis)
+    blocks = [_join(words), _join(emoji), _join(analyzer.emojis[key] for key in emoji)]
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, values.itemsize, decimals, len(words), len(emoji),
+                         source_digest.encode('ascii'), *(len(block) for block in blocks))
+    with open(path, 'wb') as target:
+        target.write(header)
+        target.write(values.tobytes())
+        for block in blocks:
+            target.write(block)
+
+
+def read_header(buffer):
+    magic, version, value_bytes, decimals, n_words, n_emoji, digest, *block_sizes = HEADER.unpack_from(buffer)
+    if magic != MAGIC:
+        raise ValueError("Not a VADER lexicon file")
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported lexicon format version {version}, expected {FORMAT_VERSION}")
+    return {
+        'format_version': version,
+        'value_bytes': value_bytes,
+        'decimals': decimals,
+        'words': n_words,
+        'emoji': n_emoji,
+        'source_digest': digest.rstrip(b'\0').decode('ascii'),
+        'block_sizes': block_sizes,
+    }
+
+
+def read_lexicon(path):
+    # Returns (lexicon, emojis, header) from a memory-mapped lexicon file
+    with open(path, 'rb') as source, mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        header = read_header(mapped)
+        offset = HEADER.size
+        values = np.frombuffer(mapped, dtype=f"<f{header['value_bytes']}", count=header['words'], offset=offset)
+        offset += values.nbytes
+        values = values.astype(np.float64)
+        if header['decimals']:
+            values = np.round(values, header['decimals'])
+        blocks = []
+        for size in header['block_sizes']:
+            blocks.append(mapped[offset:offset + size])
+            offset += size
+    words, emoji, descriptions = (_split(block) for block in blocks)
+    return dict(zip(words, values.tolist())), dict(zip(emoji, descriptions)), header
+
+
+def source_digest(path):
+    with open(path, 'rb') as source:
+        return read_header(source.read(HEADER.size))['source_digest']
+
+
+def load_analyzer(path):
+    # Build a SentimentIntensityAnalyzer from a lexicon file without reading vaderSentiment's text files
+    lexicon, emojis, _ = read_lexicon(path)
+    analyzer = SentimentIntensityAnalyzer.__new__(SentimentIntensityAnalyzer)
+    analyzer.lexicon_full_filepath = ''
+    analyzer.emoji_full_filepath = ''
+    analyzer.lexicon = lexicon
+    analyzer.emojis = emojis
+    return analyzer
+
+
+# Texts exercising every lexicon word and emoji, alone and next to VADER's
+# negations, boosters, contrast and emphasis rules
+def sample_texts(analyzer, combinations=5000, seed=0):
+    import random
+
+    rng = random.Random(seed)
+    words = sorted(analyzer.lexicon)
+    texts = words + list(analyzer.emojis)
+    modifiers = ['not', 'very', 'extremely', 'barely', 'but', 'never', 'kind of', 'no', 'least']
+    for _ in range(combinations):
+        parts = rng.sample(words, rng.randint(1, 4)) + rng.sample(modifiers, rng.randint(0, 2))
+        rng.shuffle(parts)
+        if rng.random() < 0.3:
+            parts[0] = parts[0].upper()
+        text = ' '.join(parts) + rng.choice(['', '!', '!!!', '?', ' :)'])
+        if rng.random() < 0.3:
+            text += ' ' + rng.choice(list(analyzer.emojis))
+        texts.append(text)
+    return texts
+
+
+# Score texts with both analyzers and return the texts whose scores differ
+def compare_scores(expected, actual, texts):
+    return [text for text in texts if expected.polarity_scores(text) != actual.polarity_scores(text)]
+
+
+def verify(model_path, path, texts):
+    with open(model_path, 'rb') as model_file:
+        expected = pickle.load(model_file)
+    actual = load_analyzer(path)
+    problems = []
+    if actual.lexicon != expected.lexicon:
+        problems.append("lexicon entries differ")
+    if actual.emojis != expected.emojis:
+        problems.append("emoji entries differ")
+    mismatched = compare_scores(expected, actual, texts)
+    if mismatched:
+        problems.append(f"{len(mismatched)} of {len(texts)} texts score differently, e.g. {mismatched[0]!r}")
+    if source_digest(path) != file_sha256(model_path):
+        problems.append("lexicon was exported from a different version of the model")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export or verify the compact VADER lexicon")
+    parser.add_argument('command', choices=['export', 'verify', 'info'])
+    parser.add_argument('model', help="pickled VADER model")
+    parser.add_argument('lexicon', nargs='?', help="lexicon file (default: the model path with a .vlex suffix)")
+    parser.add_argument('--sample', help="text file of sample texts to score when verifying, one per line")
+    args = parser.parse_args()
+    path = args.lexicon or lexicon_path_for(args.model)
+
+    if args.command == 'export':
+        with open(args.model, 'rb') as model_file:
+            analyzer = pickle.load(model_file)
+        export_lexicon(analyzer, path, file_sha256(args.model))
+        print(f"Wrote {path} ({os.path.getsize(path):,} bytes, model {os.path.getsize(args.model):,} bytes)")
+    elif args.command == 'info':
+        with open(path, 'rb') as source:
+            print(read_header(source.read(HEADER.size)))
+    else:
+        if args.sample:
+            with open(args.sample, encoding='utf-8') as sample:
+                texts = [line.rstrip('\n') for line in sample]
+        else:
+            texts = sample_texts(load_analyzer(path))
+        problems = verify(args.model, path, texts)
+        for problem in problems:
+            print(problem, file=sys.stderr)
+        if problems:
+            raise SystemExit(1)
+        print(f"{path} matches {args.model}: identical lexicon, emoji and scores on {len(texts):,} texts")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,337 @@
+# Live ingestion for the dashboard. A feed follows a growing JSONL/CSV file or
+# accepts newline-delimited JSON records on a local socket, scores only the
+# records that arrived since the last poll and folds them into rolling
+# per-minute, per-hour and per-day aggregates.
+#
+# Send records to a socket feed with e.g.
+#   echo '{"Tweet_Content": "Gold for France!", "Tweet_Timestamp": "2024-07-27 20:15:00"}' | nc 127.0.0.1 8700
+import csv
+import io
+import json
+import logging
+import os
+import queue
+import socketserver
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+import parallel
+import scoring
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORT = 8700
+DEFAULT_POLL_SECONDS = 2
+MAX_RECORDS_PER_POLL = 50000
+MAX_PENDING_RECORDS = 200000
+# A feed nobody has polled for this long (e.g. its last browser tab was closed) is closed
+FEED_IDLE_SECONDS = 300
+# Timestamps further ahead of the arrival time than this are taken as garbled
+MAX_CLOCK_SKEW = pd.Timedelta(minutes=5)
+
+# Bucket width and number of buckets kept for each rolling window
+WINDOWS = {
+    'minute': (pd.Timedelta(minutes=1), 180),
+    'hour': (pd.Timedelta(hours=1), 72),
+    'day': (pd.Timedelta(days=1), 60),
+}
+
+
+def parse_json_record(line):
+    try:
+        record = json.loads(line)
+    except ValueError:
+        logger.warning("Skipping malformed live record: %.80s", line)
+        return None
+    return record if isinstance(record, dict) else None
+
+
+class FileTailer:
+    # Reads the records appended to a JSONL file (one record per line) or a CSV
+    # file (where a quoted field may span lines) since the previous poll. A partly
+    # written last record is left for the next poll, and a truncated or replaced
+    # file is read again from the start.
+
+    def __init__(self, path, file_format=None):
+        self.path = path
+        self.file_format = file_format or ('csv' if path.lower().endswith('.csv') else 'jsonl')
+        self.offset = 0
+        self.header = None
+        self._file_id = None
+
+    def poll(self, max_records=MAX_RECORDS_PER_POLL):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return []
+        file_id = (stat.st_dev, stat.st_ino)
+        if file_id != self._file_id or stat.st_size < self.offset:
+            self._file_id = file_id
+            self.offset = 0
+            self.header = None
+        if stat.st_size == self.offset:
+            return []
+
+        records = []
+        with open(self.path, 'rb') as source:
+            source.seek(self.offset)
+            pending = b''
+            for line in source:
+                if not line.endswith(b'\n'):
+                    break
+                pending += line
+                # An odd number of quotes so far means a quoted CSV field continues on the next line
+                # ('"' never occurs inside a multi-byte UTF-8 character)
+                if self.file_format == 'csv' and pending.count(b'"') % 2:
+                    continue
+                self.offset += len(pending)
+                record = self.parse(pending.decode('utf-8', errors='replace').strip())
+                pending = b''
+                if record is not None:
+                    records.append(record)
+                    if len(records) >= max_records:
+                        break
+        return records
+
+    def parse(self, text):
+        # text is one whole record: a line of JSON, or a CSV row that may contain newlines
+        if not text:
+            return None
+        if self.file_format == 'jsonl':
+            return parse_json_record(text)
+        row = next(csv.reader(io.StringIO(text, newline='')))
+        if self.header is None:
+            self.header = row
+            return None
+        return dict(zip(self.header, row))
+
+    def close(self):
+        pass
+
+    def __str__(self):
+        return f"{self.path} ({self.file_format})"
+
+
+class _RecordHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            record = parse_json_record(line.decode('utf-8', errors='replace').strip())
+            if record is not None:
+                # Blocks the sender while the queue is full rather than growing without bound
+                self.server.records.put(record)
+
+
+class _RecordServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+class SocketSource:
+    # Accepts newline-delimited JSON records from any number of local connections.
+    # Records wait in a bounded queue until the feed polls them.
+
+    def __init__(self, port=DEFAULT_PORT, host='127.0.0.1', max_pending=MAX_PENDING_RECORDS):
+        self.address = (host, port)
+        self.server = _RecordServer(self.address, _RecordHandler)
+        self.server.records = queue.Queue(maxsize=max_pending)
+        self._thread = threading.Thread(target=self.server.serve_forever, name='live-socket', daemon=True)
+        self._thread.start()
+        logger.info("Live feed listening on %s:%d", host, port)
+
+    def poll(self, max_records=MAX_RECORDS_PER_POLL):
+        records = []
+        while len(records) < max_records:
+            try:
+                records.append(self.server.records.get_nowait())
+            except queue.Empty:
+                break
+        return records
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __str__(self):
+        return f"socket {self.address[0]}:{self.address[1]}"
+
+
+class RollingAggregates:
+    # Sum of compound scores, volume and label counts per time bucket, for each
+    # window in WINDOWS. Once a window holds more than its bucket count, the
+    # oldest buckets are evicted, so memory stays bounded however long the feed runs.
+
+    COLUMNS = ['score_sum', 'count'] + list(scoring.SENTIMENT_LABELS)
+
+    def __init__(self, windows=WINDOWS):
+        self.windows = windows
+        self.buckets = {name: {} for name in windows}
+
+    def update(self, df):
+        # df needs Tweet_Timestamp, sentiment and sentiment_score columns
+        values = pd.DataFrame({'score_sum': df['sentiment_score'].to_numpy(), 'count': 1}, index=df.index)
+        for label in scoring.SENTIMENT_LABELS:
+            values[label] = (df['sentiment'] == label).to_numpy()
+        values = values.astype(np.float64)
+        for name, (width, _) in self.windows.items():
+            buckets = self.buckets[name]
+            grouped = values.groupby(df['Tweet_Timestamp'].dt.floor(width)).sum()
+            for start, row in zip(grouped.index, grouped.to_numpy()):
+                if start in buckets:
+                    buckets[start] += row
+                else:
+                    buckets[start] = row
+            self.evict(name)
+
+    def evict(self, name):
+        width, keep = self.windows[name]
+        buckets = self.buckets[name]
+        if len(buckets) > keep:
+            cutoff = max(buckets) - width * (keep - 1)
+            for start in [start for start in buckets if start < cutoff]:
+                del buckets[start]
+
+    def frame(self, name):
+        # One row per bucket: date (bucket start), sentiment_score (mean), count and label counts
+        buckets = self.buckets[name]
+        starts = sorted(buckets)
+        values = pd.DataFrame([buckets[start] for start in starts], columns=self.COLUMNS)
+        df = pd.DataFrame({'date': starts})
+        df['sentiment_score'] = values['score_sum'] / values['count']
+        df['count'] = values['count'].astype('int64')
+        for label in scoring.SENTIMENT_LABELS:
+            df[label] = values[label].astype('int64')
+        return df
+
+
+class LiveFeed:
+    # Pulls new records from a source, preprocesses them with
+    # process_chunk(chunk, executor=...) (e.g. pipeline.preprocess_dataframe)
+    # and updates the rolling aggregates. With workers > 1, executor is a process
+    # pool kept for the life of the feed, otherwise None.
+    # Timestamps are read as UTC; records without one, or with one more than
+    # MAX_CLOCK_SKEW in the future, are stamped on arrival, so a bad timestamp
+    # cannot push the rolling windows forward and evict real history.
+
+    def __init__(self, source, process_chunk, aggregates=None,
+                 text_field='Tweet_Content', timestamp_field='Tweet_Timestamp', workers=1):
+        self.source = source
+        self.process_chunk = process_chunk
+        self.workers = workers
+        self.executor = parallel.make_pool(workers) if workers > 1 else None
+        self.aggregates = aggregates if aggregates is not None else RollingAggregates()
+        self.text_field = text_field
+        self.timestamp_field = timestamp_field
+        self.rows = 0
+        self.last_update = None
+        self.last_poll = time.time()
+        # Sessions watching the feed, see open_feed()
+        self.watchers = set()
+        self._lock = threading.Lock()
+
+    def set_workers(self, workers):
+        # Replace the process pool between polls; the source and the aggregates are kept
+        with self._lock:
+            if workers == self.workers:
+                return
+            if self.executor is not None:
+                self.executor.shutdown(cancel_futures=True)
+            self.executor = parallel.make_pool(workers) if workers > 1 else None
+            self.workers = workers
+
+    def poll(self, max_records=MAX_RECORDS_PER_POLL):
+        # Several dashboard sessions may share a feed; one of them polls at a time
+        with self._lock:
+            records = self.source.poll(max_records)
+            if not records:
+                return 0
+            df = pd.DataFrame.from_records(records)
+            now = pd.Timestamp.now(tz='UTC').tz_localize(None)
+            texts = df[self.text_field] if self.text_field in df else pd.Series('', index=df.index)
+            if self.timestamp_field in df:
+                timestamps = pd.to_datetime(df[self.timestamp_field], errors='coerce', utc=True).dt.tz_localize(None)
+            else:
+                timestamps = pd.Series(pd.NaT, index=df.index, dtype='datetime64[ns]')
+            timestamps = timestamps.mask(timestamps > now + MAX_CLOCK_SKEW)
+            chunk = pd.DataFrame({'Tweet_Content': texts.fillna('').astype(str),
+                                  'Tweet_Timestamp': timestamps.fillna(now)})
+            self.aggregates.update(self.process_chunk(chunk, executor=self.executor))
+            self.rows += len(chunk)
+            self.last_update = time.time()
+            return len(chunk)
+
+    def drain(self, max_polls=10, max_records=MAX_RECORDS_PER_POLL):
+        # Poll until the source is caught up, or max_polls batches have been read
+        self.last_poll = time.time()
+        total = 0
+        for _ in range(max_polls):
+            polled = self.poll(max_records)
+            total += polled
+            if polled < max_records:
+                break
+        return total
+
+    def close(self):
+        self.source.close()
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+
+
+_feeds = {}
+_feeds_lock = threading.Lock()
+
+
+# Take watcher off every feed but keep, and take out the feeds it was the last
+# watcher of or that nobody has polled for FEED_IDLE_SECONDS. Called under
+# _feeds_lock; the caller closes the returned feeds outside it.
+def _pop_unwatched(watcher, keep=None):
+    now = time.time()
+    closing = []
+    for key, feed in list(_feeds.items()):
+        if key == keep:
+            continue
+        released = watcher in feed.watchers
+        feed.watchers.discard(watcher)
+        if (released and not feed.watchers) or now - feed.last_poll > FEED_IDLE_SECONDS:
+            closing.append(_feeds.pop(key))
+    return closing
+
+
+# Process-wide live feed per source, shared by every session watching it.
+# kind is 'file' (target is a path) or 'socket' (target is a port). watcher
+# identifies the session: opening a feed releases the one it watched before,
+# and the feed's pool is resized to the workers of the last session to open it.
+def open_feed(kind, target, process_chunk, workers=1, watcher=None):
+    key = (kind, str(target))
+    closing = []
+    try:
+        with _feeds_lock:
+            closing = _pop_unwatched(watcher, keep=key)
+            feed = _feeds.get(key)
+            if feed is None:
+                source = SocketSource(int(target)) if kind == 'socket' else FileTailer(str(target))
+                feed = _feeds[key] = LiveFeed(source, process_chunk, workers=workers)
+            if watcher is not None:
+                feed.watchers.add(watcher)
+    finally:
+        for old in closing:
+            old.close()
+    feed.set_workers(workers)
+    return feed
+
+
+# Stop watching every feed, closing the ones no other session watches
+def release_feeds(watcher):
+    with _feeds_lock:
+        closing = _pop_unwatched(watcher)
+    for feed in closing:
+        feed.close()
+
+
+def close_feed(kind, target):
+    with _feeds_lock:
+        feed = _feeds.pop((kind, str(target)), None)
+    if feed is not None:
+        feed.close()
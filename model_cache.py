@@ -0,0 +1,92 @@
+import hashlib
+import logging
+import os
+import pickle
+import threading
+import time
+
+from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+
+import lexicon
+
+logger = logging.getLogger(__name__)
+
+MODEL_PATH = 'Models/vader_model.pkl'
+
+# Process-wide cache: (kind, path) -> (mtime, value). Streamlit re-executes the
+# script on every interaction but imported modules live for the whole process,
+# so entries here survive reruns and are only reloaded when the file changes.
+_cache = {}
+_lock = threading.RLock()
+stats = {'loads': 0, 'hits': 0, 'load_seconds': 0.0}
+
+
+# Load the pickled VADER model, or a stock analyzer when no model path is given.
+# A compact lexicon exported next to the pickle (lexicon.py) is used instead while
+# it was exported from this exact pickle.
+def load_vader_model(model_path=MODEL_PATH):
+    if model_path is None:
+        return SentimentIntensityAnalyzer()
+    if model_path.endswith(lexicon.LEXICON_SUFFIX):
+        return lexicon.load_analyzer(model_path)
+    compiled = lexicon.lexicon_path_for(model_path)
+    if os.path.exists(compiled):
+        try:
+            if lexicon.source_digest(compiled) == lexicon.file_sha256(model_path):
+                return lexicon.load_analyzer(compiled)
+            logger.warning("%s is out of date, loading %s instead", compiled, model_path)
+        except ValueError as error:
+            logger.warning("Ignoring %s: %s", compiled, error)
+    with open(model_path, 'rb') as vader_file:
+        return pickle.load(vader_file)
+
+
+def cached_resource(kind, path, loader):
+    # Return loader(path), reusing the cached value while the file's mtime is unchanged
+    key = (kind, os.path.abspath(path) if path is not None else None)
+    mtime = os.path.getmtime(path) if path is not None else None
+    with _lock:
+        entry = _cache.get(key)
+        if entry is not None and entry[0] == mtime:
+            stats['hits'] += 1
+            logger.info("%s cache hit (%d hits, %d loads)", kind, stats['hits'], stats['loads'])
+            return entry[1]
+
+        start = time.perf_counter()
+        value = loader(path)
+        elapsed = time.perf_counter() - start
+        stats['loads'] += 1
+        stats['load_seconds'] += elapsed
+        _cache[key] = (mtime, value)
+        logger.info("%s loaded from %s in %.3fs", kind, path or 'defaults', elapsed)
+        return value
+
+
+def get_vader_model(model_path=MODEL_PATH):
+    return cached_resource('VADER model', model_path, load_vader_model)
+
+
+def get_lexicon(model_path=MODEL_PATH):
+    return cached_resource('VADER lexicon', model_path, lambda path: get_vader_model(path).lexicon)
+
+
+def get_text_normalizer():
+    from text_processing import get_normalizer
+    return cached_resource('Text normalizer', None, lambda path: get_normalizer())
+
+
+def clear():
+    with _lock:
+        _cache.clear()
+
+
+def _file_version(path):
+    with open(path, 'rb') as model_file:
+        return hashlib.sha256(model_file.read()).hexdigest()[:12]
+
+
+# Short content hash identifying the model, used to key cached results
+def get_model_version(model_path=MODEL_PATH):
+    if model_path is None:
+        return 'vader-default'
+    return cached_resource('Model version', model_path, _file_version)
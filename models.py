@@ -0,0 +1,278 @@
+# Sentiment models selectable in the Analyzer tab and the batch scorer.
+#
+# Every model scores a batch of texts into a polarity matrix (compound/pos/neu/neg),
+# so its results share the labelling, deduplication and caching of the VADER path.
+# For the classifiers pos/neu/neg are class probabilities, compound is
+# P(positive) - P(negative) and the label is the most probable class.
+#
+# The TF-IDF + Random Forest and DistilBERT pickles are only loaded once selected.
+# DistilBERT also needs torch and transformers (pip install torch transformers).
+import pickle
+import re
+import time
+
+import numpy as np
+import pandas as pd
+
+import model_cache
+import scoring
+import startup
+
+RF_BATCH_SIZE = 10000
+BERT_BATCH_SIZE = 32
+BERT_MAX_LENGTH = 128
+LATENCY_WINDOW = 50
+
+# Accuracy is the held-out accuracy reported in Notebooks/Modelling.ipynb
+MODEL_SPECS = {
+    'vader': {
+        'title': "VADER",
+        'path': model_cache.MODEL_PATH,
+        'accuracy': 0.949,
+    },
+    'random_forest': {
+        'title': "TF-IDF + Random Forest",
+        'path': 'Models/random_forest_model.pkl',
+        'vectorizer': 'Models/tfidf_vectorizer.pkl',
+        'accuracy': 0.974,
+    },
+    'random_forest_tuned': {
+        'title': "TF-IDF + Random Forest (tuned)",
+        'path': 'Models/random_forest_tuned_model.pkl',
+        'vectorizer': 'Models/tfidf_vectorizer.pkl',
+        'accuracy': 0.966,
+    },
+    'distilbert': {
+        'title': "DistilBERT",
+        'path': 'Models/distilbert_sentiment_pipeline.pkl',
+        'accuracy': 0.443,
+    },
+}
+
+
+def load_pickle(path):
+    with open(path, 'rb') as model_file:
+        return pickle.load(model_file)
+
+
+def class_code(name, position):
+    # Label code (0 = negative, 1 = neutral, 2 = positive) of a classifier's class.
+    # Unnamed classes (LABEL_0, ...) follow the notebook's LabelEncoder order: Negative, Neutral, Positive.
+    name = str(name).upper()
+    if name in scoring.SENTIMENT_LABELS:
+        return list(scoring.SENTIMENT_LABELS).index(name)
+    match = re.fullmatch(r'LABEL_(\d)', name)
+    return int(match.group(1)) if match else position
+
+
+def matrix_from_probabilities(probabilities, class_codes):
+    # (n, classes) probabilities -> (n, 4) compound/pos/neu/neg polarity matrix
+    by_code = np.zeros((len(probabilities), 3), dtype=np.float64)
+    for column, code in enumerate(class_codes):
+        by_code[:, code] += probabilities[:, column]
+    neg, neu, pos = by_code[:, 0], by_code[:, 1], by_code[:, 2]
+    return np.column_stack([pos - neg, pos, neu, neg])
+
+
+class ModelStats:
+    # Rows scored, time spent and recent per-batch latencies of one model
+
+    def __init__(self):
+        self.load_seconds = None
+        self.rows = 0
+        self.seconds = 0.0
+        self.batches = 0
+        self.latencies = []
+
+    def record(self, rows, seconds):
+        self.rows += rows
+        self.seconds += seconds
+        self.batches += 1
+        self.latencies = (self.latencies + [seconds / max(rows, 1)])[-LATENCY_WINDOW:]
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds else None
+
+    @property
+    def median_latency_ms(self):
+        return float(np.median(self.latencies)) * 1000 if self.latencies else None
+
+    def summary(self):
+        parts = []
+        if self.load_seconds is not None:
+            parts.append(f"loaded in {self.load_seconds:.2f}s")
+        if self.rows:
+            parts.append(f"{self.rows:,} texts scored at {self.rows_per_second:,.0f} texts/s")
+            parts.append(f"{self.median_latency_ms:.2f} ms per text")
+        return " · ".join(parts) or "not used yet"
+
+
+class SentimentModel:
+    # Subclasses implement polarity_matrix(list of texts). cleaner, when set, is
+    # applied to each text first (the preprocessing the model was trained on).
+    cleaner = None
+
+    def __init__(self, name):
+        self.name = name
+        self.title = MODEL_SPECS[name]['title']
+        self.stats = ModelStats()
+
+    def polarity_matrix(self, texts):
+        raise NotImplementedError
+
+    def label_codes(self, scores):
+        return scoring.label_codes(scores[:, 0])
+
+    def _score_batch(self, texts):
+        if self.cleaner is not None:
+            texts = [self.cleaner(text) for text in texts]
+        start = time.perf_counter()
+        scores = self.polarity_matrix(texts)
+        self.stats.record(len(texts), time.perf_counter() - start)
+        return scores
+
+    # Same result frame as scoring.score_series: duplicate texts are scored once
+    # and a result_cache.ScoreCache for this model's version is consulted first.
+    def score_series(self, texts, cache=None):
+        texts = pd.Series(texts)
+        values = texts.fillna('').astype(str)
+        scores = scoring.dedup_polarity_matrix(values, self._score_batch, cache)
+        return scoring.frame_from_scores(scores, index=texts.index, codes=self.label_codes(scores))
+
+    def analyze(self, text):
+        # (label, score, emoticon) for one text, like scoring.analyze_sentiment_vader
+        row = self.score_series([text]).iloc[0]
+        return row['label'], row['compound'], row['emoticon']
+
+
+class VaderModel(SentimentModel):
+    def __init__(self, analyzer, name='vader'):
+        super().__init__(name)
+        self.analyzer = analyzer
+
+    def polarity_matrix(self, texts):
+        return scoring.polarity_matrix(self.analyzer, texts)
+
+
+class ClassifierModel(SentimentModel):
+    def label_codes(self, scores):
+        # Most probable class, ties going to the lower label code as in predict()
+        return np.argmax(scores[:, [3, 2, 1]], axis=1).astype(np.int8)
+
+
+class RandomForestModel(ClassifierModel):
+    # TF-IDF features are built with one sparse transform per batch and
+    # classified with a single predict_proba call
+
+    def __init__(self, vectorizer, classifier, name='random_forest', batch_size=RF_BATCH_SIZE):
+        super().__init__(name)
+        from text_processing import preprocess_text
+        self.cleaner = preprocess_text
+        self.vectorizer = vectorizer
+        self.classifier = classifier
+        self.batch_size = batch_size
+        self.class_codes = [class_code(label, i) for i, label in enumerate(classifier.classes_)]
+
+    def polarity_matrix(self, texts):
+        if not texts:
+            return np.empty((0, 4))
+        results = []
+        for start in range(0, len(texts), self.batch_size):
+            features = self.vectorizer.transform(texts[start:start + self.batch_size])
+            results.append(matrix_from_probabilities(self.classifier.predict_proba(features), self.class_codes))
+        return np.vstack(results)
+
+
+class DistilBertModel(ClassifierModel):
+    # Texts are tokenized once, truncated to max_length tokens and sorted by
+    # length, so each batch is padded only to its own longest text
+
+    def __init__(self, classifier_pipeline, name='distilbert', batch_size=BERT_BATCH_SIZE, max_length=BERT_MAX_LENGTH):
+        super().__init__(name)
+        self.tokenizer = classifier_pipeline.tokenizer
+        self.model = classifier_pipeline.model.eval()
+        self.batch_size = batch_size
+        self.max_length = max_length
+        id2label = self.model.config.id2label
+        self.class_codes = [class_code(id2label[i], i) for i in range(len(id2label))]
+
+    def polarity_matrix(self, texts):
+        import torch
+
+        if not texts:
+            return np.empty((0, 4))
+        input_ids = self.tokenizer(texts, truncation=True, max_length=self.max_length)['input_ids']
+        order = np.argsort([len(ids) for ids in input_ids], kind='stable')
+        probabilities = np.empty((len(texts), len(self.class_codes)), dtype=np.float64)
+        with torch.inference_mode():
+            for start in range(0, len(order), self.batch_size):
+                batch = order[start:start + self.batch_size]
+                inputs = self.tokenizer.pad({'input_ids': [input_ids[i] for i in batch]}, return_tensors='pt')
+                logits = self.model(**inputs).logits
+                probabilities[batch] = torch.softmax(logits, dim=-1).numpy()
+        return matrix_from_probabilities(probabilities, self.class_codes)
+
+
+def _load_model(name):
+    spec = MODEL_SPECS[name]
+    if name == 'vader':
+        return VaderModel(model_cache.get_vader_model(spec['path']))
+    if name == 'distilbert':
+        try:
+            import torch  # noqa: F401
+            import transformers  # noqa: F401
+        except ImportError:
+            raise ImportError("The DistilBERT model needs torch and transformers: pip install torch transformers")
+        return DistilBertModel(load_pickle(spec['path']))
+    # Its texts are cleaned with NLTK stopwords and lemmas, checked here before the first one is scored
+    missing = startup.ensure_nltk_resources()
+    if missing:
+        raise LookupError(f"The Random Forest model needs NLTK data: {', '.join(missing)}. Install it with nltk.download()")
+    return RandomForestModel(load_pickle(spec['vectorizer']), load_pickle(spec['path']), name=name)
+
+
+# Most recently loaded instance of each model, for model_comparison()
+_loaded = {}
+
+
+def _timed_load(name):
+    start = time.perf_counter()
+    model = _load_model(name)
+    model.stats.load_seconds = time.perf_counter() - start
+    _loaded[name] = model
+    return model
+
+
+# Load a model on first use; it stays cached for the process until its file changes
+def get_model(name):
+    return model_cache.cached_resource(MODEL_SPECS[name]['title'], MODEL_SPECS[name]['path'],
+                                       lambda path: _timed_load(name))
+
+
+# Version of every file the model is built from, to key cached results.
+# VADER keeps the plain model version so it shares the dashboard's score cache.
+def get_model_version(name):
+    spec = MODEL_SPECS[name]
+    if name == 'vader':
+        return model_cache.get_model_version(spec['path'])
+    versions = [model_cache.get_model_version(spec['path'])]
+    if 'vectorizer' in spec:
+        versions.append(model_cache.get_model_version(spec['vectorizer']))
+    return f"{name}-{'-'.join(versions)}"
+
+
+# Speed of every model loaded in this process next to its reported accuracy
+def model_comparison():
+    rows = []
+    for name, spec in MODEL_SPECS.items():
+        stats = _loaded[name].stats if name in _loaded else None
+        rows.append({
+            'Model': spec['title'],
+            'Reported accuracy': spec['accuracy'],
+            'Load (s)': stats.load_seconds if stats else None,
+            'Texts scored': stats.rows if stats else 0,
+            'Texts/s': stats.rows_per_second if stats else None,
+            'ms per text': stats.median_latency_ms if stats else None,
+        })
+    return pd.DataFrame(rows)
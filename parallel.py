@@ -0,0 +1,120 @@
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+import scoring
+from model_cache import MODEL_PATH, get_vader_model, load_vader_model
+
+DEFAULT_CHUNK_SIZE = 5000
+
+# VADER analyzer owned by the current worker process, set once by _init_worker
+_worker_analyzer = None
+
+
+def default_workers():
+    return os.cpu_count() or 1
+
+
+def _init_worker(model_path):
+    # Runs once per worker so the lexicon is never shipped with a task
+    global _worker_analyzer
+    _worker_analyzer = load_vader_model(model_path)
+
+
+def _clean_and_score(analyzer, texts, cleaner):
+    if cleaner is not None:
+        texts = [cleaner(text) for text in texts]
+    return texts, scoring.polarity_matrix(analyzer, texts)
+
+
+def _score_chunk(texts, cleaner):
+    # Clean (optionally) and score one chunk inside a worker
+    return _clean_and_score(_worker_analyzer, texts, cleaner)
+
+
+def _extract_chunk(texts, extractor):
+    return [extractor(text) for text in texts]
+
+
+def split_chunks(values, chunk_size):
+    return [values[start:start + chunk_size] for start in range(0, len(values), chunk_size)]
+
+
+# A pool whose workers each load the model once. Pass it as executor= to reuse it across calls.
+def make_pool(workers=None, model_path=MODEL_PATH):
+    return ProcessPoolExecutor(max_workers=workers or default_workers(), initializer=_init_worker,
+                               initargs=(model_path,))
+
+
+# Pass chunks through, shutting executor down once they run out or the consumer stops early
+def shutdown_after(chunks, executor):
+    try:
+        yield from chunks
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+
+def _map_chunks(task, local_task, values, model_path, workers, chunk_size, executor=None):
+    # Results of task for each chunk of values, in order. local_task runs the
+    # chunks in this process instead when a pool isn't worth it.
+    # Use at least a few chunks per worker so one slow chunk doesn't idle the pool
+    chunk_size = max(1, min(chunk_size, math.ceil(len(values) / (workers * 4))))
+    chunks = split_chunks(values, chunk_size)
+
+    if len(chunks) <= 1 or (workers <= 1 and executor is None):
+        return [local_task(chunk) for chunk in chunks]
+    if executor is not None:
+        # map() yields results in submission order, so rows stay aligned
+        return list(executor.map(task, chunks))
+    with make_pool(workers, model_path) as executor:
+        return list(executor.map(task, chunks))
+
+
+def _run_pool(values, model_path, cleaner, workers, chunk_size, executor=None):
+    # Clean and score a list of values, returning (cleaned texts, polarity matrix) in order
+    results = _map_chunks(partial(_score_chunk, cleaner=cleaner),
+                          lambda chunk: _clean_and_score(get_vader_model(model_path), chunk, cleaner),
+                          values, model_path, workers, chunk_size, executor)
+    cleaned = [text for chunk_texts, _ in results for text in chunk_texts]
+    scores = np.vstack([chunk_scores for _, chunk_scores in results]) if results else np.empty((0, 4))
+    return cleaned, scores
+
+
+def score_series_parallel(texts, model_path=MODEL_PATH, cleaner=None, workers=None,
+                          chunk_size=DEFAULT_CHUNK_SIZE, cache=None, executor=None):
+    # Clean and score a Series in a process pool, keeping the original row order.
+    # The result has the score_series columns plus 'cleaned' when a cleaner is given.
+    # Duplicate texts are only sent to the pool once; a ScoreCache is consulted when
+    # scoring raw texts (cleaned texts only exist inside the workers).
+    texts = pd.Series(texts)
+    workers = workers or default_workers()
+
+    if cleaner is None:
+        values = texts.fillna('').astype(str).tolist()
+        scores = scoring.dedup_polarity_matrix(
+            values, lambda batch: _run_pool(batch, model_path, None, workers, chunk_size, executor)[1], cache)
+        return scoring.frame_from_scores(scores, index=texts.index)
+
+    codes, uniques = pd.factorize(pd.Series(texts.tolist(), dtype=object), use_na_sentinel=False)
+    cleaned, unique_scores = _run_pool(list(uniques), model_path, cleaner, workers, chunk_size, executor)
+    result = scoring.frame_from_scores(unique_scores[codes], index=texts.index)
+    result.insert(0, 'cleaned', [cleaned[code] for code in codes])
+    return result
+
+
+# extractor(text) (e.g. text_processing.extract_features) for each text of a
+# Series, computed in a process pool and returned as a list in row order.
+# Duplicate texts are only sent to the pool once.
+def extract_parallel(texts, extractor, model_path=MODEL_PATH, workers=None, chunk_size=DEFAULT_CHUNK_SIZE,
+                     executor=None):
+    workers = workers or default_workers()
+    codes, uniques = pd.factorize(pd.Series(list(texts), dtype=object), use_na_sentinel=False)
+    task = partial(_extract_chunk, extractor=extractor)
+    results = _map_chunks(task, task, list(uniques), model_path, workers, chunk_size, executor)
+    extracted = [result for chunk_results in results for result in chunk_results]
+    return [extracted[code] for code in codes]
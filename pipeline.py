@@ -0,0 +1,79 @@
+import pandas as pd
+
+import parallel
+import scoring
+from instrumentation import NULL_RECORDER
+from model_cache import MODEL_PATH, get_text_normalizer, get_vader_model
+from text_processing import clean_tweet, extract_features, preprocess_text
+
+
+# Clean, date and score a frame of tweets for the dashboard, adding Cleaned_Tweet,
+# hashtags, date, sentiment and sentiment_score columns
+# (recorder, an instrumentation.Recorder, times the cleaning and scoring stages).
+# With workers > 1, or a parallel.make_pool() pool as executor to reuse it across
+# chunks, both stages run in a process pool.
+def preprocess_dataframe(df, analyzer=None, workers=1, model_path=MODEL_PATH, cache=None, recorder=NULL_RECORDER,
+                         executor=None):
+    in_pool = workers > 1 or executor is not None
+
+    # Preprocess the 'Tweet_Content' column, keeping the hashtags found on the way
+    with recorder.stage('preprocess_text', rows=len(df)):
+        if in_pool:
+            features = parallel.extract_parallel(df['Tweet_Content'], extract_features, model_path=model_path,
+                                                 workers=workers, executor=executor)
+        else:
+            features = get_text_normalizer().extract_batch(df['Tweet_Content'])
+        df['Cleaned_Tweet'] = [feature.cleaned for feature in features]
+        df['hashtags'] = [feature.hashtags for feature in features]
+
+    # Convert 'Tweet_Timestamp' to datetime and extract date
+    df['Tweet_Timestamp'] = pd.to_datetime(df['Tweet_Timestamp'])
+    df['date'] = df['Tweet_Timestamp'].dt.date
+
+    # Apply sentiment analysis, scoring each tweet once
+    with recorder.stage('vader_scoring', rows=len(df)):
+        if in_pool:
+            scores = parallel.score_series_parallel(df['Cleaned_Tweet'], model_path=model_path, workers=workers,
+                                                    cache=cache, executor=executor)
+        else:
+            analyzer = analyzer if analyzer is not None else get_vader_model(model_path)
+            scores = scoring.score_series(analyzer, df['Cleaned_Tweet'], cache=cache)
+    df['sentiment'] = scores['label']
+    df['sentiment_score'] = scores['compound']
+
+    return df
+
+
+CLEANERS = {
+    'none': None,
+    'tweet': clean_tweet,
+    'preprocess': preprocess_text,
+}
+
+
+# Add the Analyzer's Sentiment/Score/Emoticon columns to a frame, cleaning the text first
+# when clean is 'tweet' or 'preprocess' (the cleaned text is kept as Cleaned_Text).
+# Pass a models.SentimentModel as model to score with it instead of VADER (in this process).
+def score_frame(df, text_column, clean='none', analyzer=None, workers=1, model_path=MODEL_PATH,
+                cache=None, executor=None, model=None):
+    cleaner = CLEANERS[clean]
+    texts = df[text_column].fillna('').astype(str)
+    if model is not None:
+        if cleaner is not None:
+            texts = df['Cleaned_Text'] = texts.map(cleaner)
+        scores = model.score_series(texts, cache=cache)
+    elif workers > 1 or executor is not None:
+        scores = parallel.score_series_parallel(texts, model_path=model_path, cleaner=cleaner,
+                                                workers=workers, cache=cache, executor=executor)
+        if cleaner is not None:
+            df['Cleaned_Text'] = scores['cleaned']
+    else:
+        if cleaner is not None:
+            texts = df['Cleaned_Text'] = texts.map(cleaner)
+        analyzer = analyzer if analyzer is not None else get_vader_model(model_path)
+        scores = scoring.score_series(analyzer, texts, cache=cache)
+
+    df['Sentiment'] = scores['label']
+    df['Score'] = scores['compound']
+    df['Emoticon'] = scores['emoticon']
+    return df
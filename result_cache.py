@@ -0,0 +1,136 @@
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SCORE_CACHE_SIZE = 500000
+DEFAULT_FILE_CACHE_SIZE = 8
+MAX_SCORE_CACHES = 4
+
+
+# VADER splits on whitespace, so texts that differ only in spacing score the same
+def normalize_text(text):
+    return ' '.join(text.split())
+
+
+def text_key(text):
+    return hashlib.blake2b(normalize_text(text).encode('utf-8'), digest_size=16).digest()
+
+
+# Content hash of an uploaded (file-like or bytes) object, read in blocks
+def file_digest(source, block_size=1 << 20):
+    digest = hashlib.sha256()
+    if isinstance(source, (bytes, bytearray)):
+        digest.update(source)
+        return digest.hexdigest()
+    position = source.tell()
+    source.seek(0)
+    for block in iter(lambda: source.read(block_size), b''):
+        digest.update(block)
+    source.seek(position)
+    return digest.hexdigest()
+
+
+# Content hash of several uploads in order, from their file_digests; a single upload keeps its own
+def combine_digests(digests):
+    if len(digests) == 1:
+        return digests[0]
+    return hashlib.sha256('\n'.join(digests).encode('ascii')).hexdigest()
+
+
+class LRUCache:
+    # Thread-safe LRU mapping with hit/miss counters
+
+    def __init__(self, max_entries, name='cache'):
+        self.max_entries = max_entries
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def summary(self):
+        return (f"{self.name}: {self.hit_rate:.0%} hit rate "
+                f"({self.hits:,} hits, {self.misses:,} misses, {len(self):,} entries)")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+
+class ScoreCache(LRUCache):
+    # Maps a text's content hash to its (compound, pos, neu, neg) scores
+
+    def __init__(self, max_entries=DEFAULT_SCORE_CACHE_SIZE, name='Score cache'):
+        super().__init__(max_entries, name)
+
+    def lookup_many(self, texts):
+        # Returns the keys, a (n, 4) array of cached scores and a mask of the misses
+        keys = [text_key(text) for text in texts]
+        scores = np.empty((len(keys), 4), dtype=np.float64)
+        missing = np.zeros(len(keys), dtype=bool)
+        for i, key in enumerate(keys):
+            cached = self.get(key)
+            if cached is None:
+                missing[i] = True
+            else:
+                scores[i] = cached
+        return keys, scores, missing
+
+    def store_many(self, keys, scores):
+        for key, row in zip(keys, scores):
+            self.put(key, tuple(row))
+
+
+_score_caches = OrderedDict()
+_file_cache = LRUCache(DEFAULT_FILE_CACHE_SIZE, name='File cache')
+
+
+# Process-wide score cache for one model version. Caches of the MAX_SCORE_CACHES most
+# recently used versions are kept (one per selectable model), older ones are dropped.
+def get_score_cache(model_version):
+    if model_version not in _score_caches:
+        _score_caches[model_version] = ScoreCache()
+        while len(_score_caches) > MAX_SCORE_CACHES:
+            _score_caches.popitem(last=False)
+    _score_caches.move_to_end(model_version)
+    return _score_caches[model_version]
+
+
+# Process-wide cache of processed uploads, keyed by (upload digest, options, model version)
+def get_file_cache():
+    return _file_cache
+
+
+def log_hit_rates(*caches):
+    for cache in caches:
+        logger.info(cache.summary())
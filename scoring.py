@@ -0,0 +1,96 @@
+import numpy as np
+import pandas as pd
+
+# VADER compound score thresholds used to label a text
+POSITIVE_THRESHOLD = 0.05
+NEGATIVE_THRESHOLD = -0.05
+
+# Labels and emoticons, indexed by label code (0 = negative, 1 = neutral, 2 = positive)
+SENTIMENT_LABELS = np.array(['NEGATIVE', 'NEUTRAL', 'POSITIVE'], dtype=object)
+SENTIMENT_EMOTICONS = np.array(['😞', '😐', '😄'], dtype=object)
+UNKNOWN_EMOTICON = "❓"
+
+SCORE_COLUMNS = ['label', 'compound', 'pos', 'neu', 'neg', 'emoticon']
+
+
+# Function to get sentiment emoticon
+def get_sentiment_emoticon(sentiment):
+    emoticons = dict(zip(SENTIMENT_LABELS, SENTIMENT_EMOTICONS))
+    return emoticons.get(sentiment, UNKNOWN_EMOTICON)
+
+
+def label_codes(compound):
+    # Map compound scores to label codes with the same thresholds as analyze_sentiment_vader
+    compound = np.asarray(compound, dtype=np.float64)
+    codes = np.ones(compound.shape, dtype=np.int8)
+    codes[compound >= POSITIVE_THRESHOLD] = 2
+    codes[compound <= NEGATIVE_THRESHOLD] = 0
+    return codes
+
+
+# Determine sentiment based on VADER compound score
+def sentiment_label(compound_score):
+    if compound_score >= POSITIVE_THRESHOLD:
+        return 'POSITIVE'
+    elif compound_score <= NEGATIVE_THRESHOLD:
+        return 'NEGATIVE'
+    return 'NEUTRAL'
+
+
+# Function to analyze sentiment of a single text using VADER
+def analyze_sentiment_vader(analyzer, text):
+    compound_score = analyzer.polarity_scores(text)['compound']
+    sentiment = sentiment_label(compound_score)
+    return sentiment, compound_score, get_sentiment_emoticon(sentiment)
+
+
+def polarity_matrix(analyzer, texts):
+    # Score every text exactly once into a (n, 4) array of compound/pos/neu/neg
+    texts = list(texts)
+    scores = np.empty((len(texts), 4), dtype=np.float64)
+    for i, text in enumerate(texts):
+        vs = analyzer.polarity_scores(text)
+        scores[i] = (vs['compound'], vs['pos'], vs['neu'], vs['neg'])
+    return scores
+
+
+def frame_from_scores(scores, index=None, codes=None):
+    # Build the batch result frame from a polarity matrix, labelling in one vectorized step.
+    # Models that pick the label themselves pass its codes, otherwise it comes from the compound score.
+    if codes is None:
+        codes = label_codes(scores[:, 0])
+    return pd.DataFrame({
+        'label': SENTIMENT_LABELS[codes],
+        'compound': scores[:, 0],
+        'pos': scores[:, 1],
+        'neu': scores[:, 2],
+        'neg': scores[:, 3],
+        'emoticon': SENTIMENT_EMOTICONS[codes],
+    }, index=index)
+
+
+def dedup_polarity_matrix(values, score_batch, cache=None):
+    # Score each distinct text once, skipping texts already in the cache, then
+    # broadcast the scores back to every row. score_batch maps a list of texts
+    # to a polarity matrix.
+    codes, uniques = pd.factorize(pd.Series(values, dtype=object))
+    uniques = list(uniques)
+    if cache is None:
+        unique_scores = score_batch(uniques)
+    else:
+        keys, unique_scores, missing = cache.lookup_many(uniques)
+        if missing.any():
+            fresh = score_batch([text for text, miss in zip(uniques, missing) if miss])
+            unique_scores[missing] = fresh
+            cache.store_many([key for key, miss in zip(keys, missing) if miss], fresh)
+    return unique_scores[codes]
+
+
+# Score a Series of texts in one pass, returning label/compound/pos/neu/neg/emoticon per row.
+# Duplicate texts are scored once; pass a result_cache.ScoreCache to reuse scores across calls.
+def score_series(analyzer, texts, cache=None):
+    texts = pd.Series(texts)
+    # Missing values are scored as empty text instead of raising inside VADER
+    values = texts.fillna('').astype(str)
+    scores = dedup_polarity_matrix(values, lambda batch: polarity_matrix(analyzer, batch), cache)
+    return frame_from_scores(scores, index=texts.index)
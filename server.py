@@ -0,0 +1,175 @@
+# Local HTTP scoring service wrapping the Analyzer's VADER scoring.
+#
+#   python server.py --port 8600
+#
+#   POST /score        {"text": "..."}          -> {"label", "compound", "pos", "neu", "neg", "emoticon"}
+#   POST /score/batch  {"texts": ["...", ...]}  -> {"results": [...]}
+#   GET  /health                                 -> model version, cache and batching stats
+#
+# Concurrent /score requests are coalesced into micro-batches: a batch is scored
+# once it reaches --max-batch texts or the oldest request has waited --max-wait-ms.
+import argparse
+import asyncio
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+import tornado.web
+
+import model_cache
+import result_cache
+import scoring
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORT = 8600
+DEFAULT_MAX_BATCH = 256
+DEFAULT_MAX_WAIT_MS = 5
+MAX_BATCH_REQUEST = 10000
+
+
+def score_records(analyzer, texts, cache=None):
+    return scoring.score_series(analyzer, texts, cache=cache).to_dict(orient='records')
+
+
+class MicroBatcher:
+    # Collects single-text requests and scores them together off the event loop
+
+    def __init__(self, analyzer, cache=None, max_batch=DEFAULT_MAX_BATCH, max_wait_ms=DEFAULT_MAX_WAIT_MS):
+        self.analyzer = analyzer
+        self.cache = cache
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        # One scoring thread: batches run in order while the loop keeps accepting requests
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='scorer')
+        self.batches = 0
+        self.texts = 0
+        self._pending = []
+        self._timer = None
+        self._tasks = set()
+
+    async def score(self, text):
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((text, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.max_wait, self._flush)
+        return await future
+
+    async def score_many(self, texts):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, score_records, self.analyzer, texts, self.cache)
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._score_batch(batch))
+            # Keep a reference so the task isn't garbage collected mid-flight
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _score_batch(self, batch):
+        self.batches += 1
+        self.texts += len(batch)
+        try:
+            results = await self.score_many([text for text, _ in batch])
+        except Exception as error:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(error)
+            return
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self):
+        return {
+            'batches': self.batches,
+            'texts': self.texts,
+            'mean_batch_size': self.texts / self.batches if self.batches else 0.0,
+        }
+
+
+class BaseHandler(tornado.web.RequestHandler):
+    def initialize(self, batcher, model_version):
+        self.batcher = batcher
+        self.model_version = model_version
+
+    def read_json(self):
+        try:
+            return json.loads(self.request.body or b'{}')
+        except ValueError:
+            raise tornado.web.HTTPError(400, reason="Request body must be JSON")
+
+    def write_error(self, status_code, **kwargs):
+        self.finish({'error': self._reason})
+
+
+class ScoreHandler(BaseHandler):
+    async def post(self):
+        text = self.read_json().get('text')
+        if not isinstance(text, str):
+            raise tornado.web.HTTPError(400, reason="Expected {\"text\": \"...\"}")
+        self.write(await self.batcher.score(text))
+
+
+class BatchScoreHandler(BaseHandler):
+    async def post(self):
+        texts = self.read_json().get('texts')
+        if not isinstance(texts, list) or not all(isinstance(text, str) for text in texts):
+            raise tornado.web.HTTPError(400, reason="Expected {\"texts\": [\"...\", ...]}")
+        if len(texts) > MAX_BATCH_REQUEST:
+            raise tornado.web.HTTPError(413, reason=f"At most {MAX_BATCH_REQUEST} texts per request")
+        self.write({'results': await self.batcher.score_many(texts)})
+
+
+class HealthHandler(BaseHandler):
+    def get(self):
+        cache = self.batcher.cache
+        self.write({
+            'status': 'ok',
+            'model_version': self.model_version,
+            'batching': self.batcher.stats(),
+            'score_cache': {'hits': cache.hits, 'misses': cache.misses, 'hit_rate': cache.hit_rate} if cache else None,
+        })
+
+
+def make_app(model_path=model_cache.MODEL_PATH, max_batch=DEFAULT_MAX_BATCH, max_wait_ms=DEFAULT_MAX_WAIT_MS):
+    # The model is loaded once, when the app is built
+    analyzer = model_cache.get_vader_model(model_path)
+    model_version = model_cache.get_model_version(model_path)
+    batcher = MicroBatcher(analyzer, result_cache.get_score_cache(model_version), max_batch, max_wait_ms)
+    handler_args = {'batcher': batcher, 'model_version': model_version}
+    return tornado.web.Application([
+        (r'/score', ScoreHandler, handler_args),
+        (r'/score/batch', BatchScoreHandler, handler_args),
+        (r'/health', HealthHandler, handler_args),
+    ])
+
+
+async def serve(args):
+    app = make_app(args.model, args.max_batch, args.max_wait_ms)
+    app.listen(args.port, address=args.host)
+    logger.info("Scoring service listening on http://%s:%d", args.host, args.port)
+    await asyncio.Event().wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local HTTP sentiment scoring service")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--model', default=model_cache.MODEL_PATH, help="pickled VADER model")
+    parser.add_argument('--max-batch', type=int, default=DEFAULT_MAX_BATCH, help="texts per micro-batch")
+    parser.add_argument('--max-wait-ms', type=float, default=DEFAULT_MAX_WAIT_MS,
+                        help="longest a request waits for its micro-batch to fill")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(serve(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+# Fixed-memory approximate counting of the most frequent items.
+#
+# FrequentItems is a Misra-Gries summary, the counter-based twin of
+# Space-Saving, in its mergeable form (Agarwal et al., "Mergeable Summaries").
+# It keeps at most `capacity` counters; whenever more are needed the
+# (capacity + 1)-th largest count is subtracted from every counter and the
+# ones that drop to zero are forgotten. For a stream of N items:
+#   - every kept count is an underestimate by at most `error` <= N / (capacity + 1)
+#   - every item occurring more than `error` times is kept
+# Summaries built on separate chunks or worker processes merge into a summary
+# with the same guarantee for the combined stream.
+import heapq
+import math
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_ERROR = 0.0001
+
+
+def capacity_for(error_ratio):
+    # Counters needed so the undercount stays within error_ratio * N
+    if not 0 < error_ratio < 1:
+        raise ValueError("error_ratio must be between 0 and 1")
+    return max(math.ceil(1 / error_ratio) - 1, 1)
+
+
+class FrequentItems:
+
+    def __init__(self, capacity=None, error_ratio=DEFAULT_ERROR):
+        self.capacity = capacity if capacity is not None else capacity_for(error_ratio)
+        self.counts = {}
+        # Number of items seen and the largest possible undercount of any item
+        self.total = 0
+        self.error = 0
+
+    def __len__(self):
+        return len(self.counts)
+
+    def update(self, counts):
+        # Fold in exact item -> count pairs (e.g. a Counter of one chunk)
+        merged = self.counts
+        for item, count in counts.items():
+            merged[item] = merged.get(item, 0) + count
+            self.total += count
+        self._prune()
+        return self
+
+    def merge(self, other):
+        self.error += other.error
+        self.update(other.counts)
+        # update() counted the other summary's kept counts; its total covers everything it saw
+        self.total += other.total - sum(other.counts.values())
+        return self
+
+    def _prune(self):
+        if len(self.counts) <= self.capacity:
+            return
+        values = np.fromiter(self.counts.values(), dtype=np.int64, count=len(self.counts))
+        cut = int(np.partition(values, len(values) - self.capacity - 1)[len(values) - self.capacity - 1])
+        self.error += cut
+        self.counts = {item: count - cut for item, count in self.counts.items() if count > cut}
+
+    def estimate(self, item):
+        # (lower, upper) bounds of the item's true count
+        count = self.counts.get(item, 0)
+        return count, count + self.error
+
+    def most_common(self, n=None):
+        if n is None:
+            return sorted(self.counts.items(), key=lambda pair: pair[1], reverse=True)
+        return heapq.nlargest(n, self.counts.items(), key=lambda pair: pair[1])
+
+    def top(self, n=10):
+        return pd.Series(dict(self.most_common(n)), name='count', dtype='int64')
+
+    @property
+    def error_ratio(self):
+        return self.error / self.total if self.total else 0.0
@@ -0,0 +1,114 @@
+import json
+import logging
+import os
+import time
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+
+# Set OLYMPICS_OFFLINE=1 on air-gapped hosts to skip every network call
+OFFLINE = os.environ.get('OLYMPICS_OFFLINE', '').lower() in ('1', 'true', 'yes')
+
+# NLTK data the app actually reads, mapped to its nltk.data path
+NLTK_RESOURCES = {
+    'stopwords': 'corpora/stopwords',
+    'wordnet': 'corpora/wordnet',
+}
+
+LOTTIE_CACHE_DIR = os.path.join('Images', 'lottie')
+LOTTIE_TIMEOUT = 2
+LOTTIE_URLS = {
+    'home': "https://lottie.host/fe78a580-e21b-4613-b5d6-cc64b1a934b7/vDApSHkH81.json",
+    'analyzer': "https://lottie.host/83213d4d-0fde-4804-86d7-03b17919cf3b/nYDHta6PFS.json",
+    'dashboard': "https://lottie.host/a96d76d8-f260-420f-98be-03cf4f377403/NKKum85jXp.json",
+    'team': "https://lottie.host/18039274-4e01-4558-845e-a1d1d3b950eb/cKT9Btma01.json",
+    'about': "https://lottie.host/93047e01-af1c-425a-89f5-c4d49abc3aaa/LVMzN5PPXM.json",
+}
+
+_first_render_logged = False
+# Set after a fetch fails to connect, so a host without network access waits for one timeout, not one per animation
+_network_failed = False
+
+
+# Check the NLTK data once per process, downloading only what is missing
+@lru_cache(maxsize=None)
+def ensure_nltk_resources(download=not OFFLINE):
+    import nltk
+
+    missing = []
+    for name, path in NLTK_RESOURCES.items():
+        try:
+            nltk.data.find(path)
+        except LookupError:
+            if download and nltk.download(name, quiet=True):
+                continue
+            missing.append(name)
+    if missing:
+        logger.warning("Missing NLTK resources: %s", ', '.join(missing))
+    return tuple(missing)
+
+
+def lottie_cache_path(url):
+    return os.path.join(LOTTIE_CACHE_DIR, url.rstrip('/').rsplit('/', 1)[-1])
+
+
+def fetch_lottie(url, timeout=LOTTIE_TIMEOUT):
+    global _network_failed
+    import requests
+
+    if _network_failed:
+        return None
+    try:
+        r = requests.get(url, timeout=timeout)
+        if r.status_code != 200:
+            return None
+        return r.json()
+    except (requests.ConnectionError, requests.Timeout):
+        _network_failed = True
+        logger.warning("Could not reach %s, skipping the other Lottie animations not cached in %s",
+                       url, LOTTIE_CACHE_DIR)
+        return None
+    except (requests.RequestException, ValueError):
+        logger.warning("Could not fetch Lottie animation %s", url)
+        return None
+
+
+# Load a Lottie animation from the on-disk cache, falling back to a short network fetch.
+# Results (including failures) are remembered for the life of the process.
+@lru_cache(maxsize=None)
+def load_lottie(url, offline=OFFLINE):
+    path = lottie_cache_path(url)
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as lottie_file:
+            return json.load(lottie_file)
+    if offline:
+        return None
+    lottie_json = fetch_lottie(url)
+    if lottie_json is not None:
+        try:
+            os.makedirs(LOTTIE_CACHE_DIR, exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as lottie_file:
+                json.dump(lottie_json, lottie_file)
+        except OSError:
+            pass
+    return lottie_json
+
+
+# Log how long this script run took, separating the first render from reruns
+def log_render_time(run_start):
+    global _first_render_logged
+    now = time.perf_counter()
+    if not _first_render_logged:
+        _first_render_logged = True
+        logger.info("First render (cold start) in %.2fs", now - run_start)
+    else:
+        logger.info("Rerun rendered in %.2fs", now - run_start)
+    return now - run_start
+
+
+# Populate the bundled Lottie cache: python startup.py
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    for name, url in LOTTIE_URLS.items():
+        animation = load_lottie(url, offline=False)
+        print(f"{name:<10} {'cached' if animation is not None else 'FAILED'}  {lottie_cache_path(url)}")
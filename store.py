@@ -0,0 +1,330 @@
+# Persistent store of scored tweets (SQLite). Tweets are kept with their cleaned
+# text, timestamp, date, sentiment, score and hashtags, indexed by date and by
+# hashtag. Per-day aggregates are maintained on every append, so dashboard
+# queries over a date range or a hashtag read a few hundred rows at most.
+#
+# Uploads are appended incrementally and recorded by content digest, so the
+# same file is never scored into the store twice.
+import os
+import socket
+import sqlite3
+import threading
+from contextlib import closing, contextmanager
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+
+from streaming import HASHTAG_PATTERN
+
+DEFAULT_STORE_PATH = os.environ.get('OLYMPICS_STORE', os.path.join('Data', 'tweets.sqlite'))
+SCHEMA_VERSION = 3
+# Seconds a connection waits for another process's write to finish
+BUSY_TIMEOUT = 30
+# A pending upload whose owner has not committed a chunk for this long is taken as abandoned
+STALE_UPLOAD_SECONDS = 3600
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS uploads (
+    digest TEXT PRIMARY KEY, name TEXT, model_version TEXT, rows INTEGER, added TEXT,
+    status TEXT NOT NULL DEFAULT 'done', owner_host TEXT, owner_pid INTEGER, updated TEXT);
+CREATE TABLE IF NOT EXISTS tweets (
+    id INTEGER PRIMARY KEY, upload TEXT, timestamp TEXT, date TEXT,
+    cleaned TEXT, sentiment TEXT, sentiment_score REAL, hashtags TEXT);
+CREATE INDEX IF NOT EXISTS tweets_date ON tweets (date);
+CREATE TABLE IF NOT EXISTS tweet_hashtags (hashtag TEXT, date TEXT, tweet_id INTEGER);
+CREATE INDEX IF NOT EXISTS tweet_hashtags_hashtag ON tweet_hashtags (hashtag, date);
+CREATE TABLE IF NOT EXISTS daily (
+    date TEXT, sentiment TEXT, count INTEGER, score_sum REAL,
+    PRIMARY KEY (date, sentiment)) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS daily_hashtags (
+    hashtag TEXT, date TEXT, sentiment TEXT, count INTEGER, score_sum REAL,
+    PRIMARY KEY (hashtag, date, sentiment)) WITHOUT ROWID;
+"""
+
+# Columns added to uploads since version 1, for stores created before them
+UPLOAD_COLUMNS = {
+    'status': "TEXT NOT NULL DEFAULT 'done'",
+    'owner_host': "TEXT",
+    'owner_pid': "INTEGER",
+    'updated': "TEXT",
+}
+# An upload still being saved by the given owner, with (digest, owner_host, owner_pid) as parameters
+OWN_PENDING_UPLOAD = "digest = ? AND status = 'pending' AND owner_host = ? AND owner_pid = ?"
+
+
+# Distinct lower-cased hashtags of each tweet, in order of appearance
+def tweet_hashtags(content):
+    return [list(dict.fromkeys(HASHTAG_PATTERN.findall(tweet.lower()))) for tweet in content]
+
+
+def _utc_now():
+    return datetime.now(timezone.utc).isoformat(timespec='seconds')
+
+
+def _process_alive(pid):
+    if os.name == 'nt':
+        # os.kill() would terminate the process on Windows; only staleness counts there
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _date_filter(column, start, end):
+    clauses, params = [], []
+    if start is not None:
+        clauses.append(f"{column} >= ?")
+        params.append(str(start))
+    if end is not None:
+        clauses.append(f"{column} <= ?")
+        params.append(str(end))
+    return clauses, params
+
+
+class TweetStore:
+    # Connections are opened per operation, so one store can be shared across
+    # Streamlit sessions (threads). Hashtag aggregates count tweets, not mentions.
+    # Writes are short transactions, one per chunk, taken in turn by every
+    # session and process.
+
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        self.path = path
+        self._write_lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with closing(self.connect()) as conn:
+            conn.executescript(SCHEMA)
+            columns = [column[1] for column in conn.execute("PRAGMA table_info(uploads)")]
+            for column, definition in UPLOAD_COLUMNS.items():
+                if column not in columns:
+                    # Uploads of older stores were all saved in one transaction, so they are done
+                    conn.execute(f"ALTER TABLE uploads ADD COLUMN {column} {definition}")
+            conn.execute("INSERT OR REPLACE INTO meta VALUES ('schema_version', ?)", (str(SCHEMA_VERSION),))
+            conn.commit()
+            with self._transaction(conn):
+                self._remove_abandoned(conn)
+
+    @contextmanager
+    def _transaction(self, conn):
+        # BEGIN IMMEDIATE takes SQLite's write lock before anything is read, so
+        # what the transaction reads cannot change under it in another process
+        with self._write_lock, conn:
+            conn.execute("BEGIN IMMEDIATE")
+            yield
+
+    def connect(self):
+        conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    # True once an upload is saved or being saved
+    def has_upload(self, digest):
+        with closing(self.connect()) as conn:
+            return conn.execute("SELECT 1 FROM uploads WHERE digest = ?", (digest,)).fetchone() is not None
+
+    def uploads(self):
+        with closing(self.connect()) as conn:
+            return pd.read_sql_query("SELECT * FROM uploads ORDER BY added", conn)
+
+    # Writing
+
+    def save_chunks(self, chunks, digest, name='', model_version=''):
+        # Pass preprocessed chunks through unchanged while appending them to the
+        # store. The upload is claimed as pending first and each chunk committed
+        # on its own, so other sessions can write in between. It is marked done
+        # once every chunk has been consumed and removed again if processing
+        # stops early. An upload another session has claimed is not written twice.
+        # The claim records this process and is touched with every chunk, so
+        # other processes can tell a live save from an abandoned one.
+        owner = (socket.gethostname(), os.getpid())
+        with closing(self.connect()) as conn:
+            with self._transaction(conn):
+                self._remove_abandoned(conn)
+                now = _utc_now()
+                claimed = conn.execute(
+                    "INSERT OR IGNORE INTO uploads (digest, name, model_version, rows, added, status, owner_host,"
+                    " owner_pid, updated) VALUES (?, ?, ?, 0, ?, 'pending', ?, ?, ?)",
+                    (digest, name, model_version, now, *owner, now)).rowcount
+            saved = False
+            try:
+                for chunk in chunks:
+                    if claimed:
+                        with self._transaction(conn):
+                            # No row left means the claim was removed as abandoned; the rest is not saved
+                            claimed = conn.execute(f"UPDATE uploads SET rows = rows + ?, updated = ? WHERE {OWN_PENDING_UPLOAD}",
+                                                   (len(chunk), _utc_now(), digest, *owner)).rowcount
+                            if claimed:
+                                self._append(conn, chunk, digest)
+                    yield chunk
+                if claimed:
+                    with self._transaction(conn):
+                        saved = conn.execute(f"UPDATE uploads SET status = 'done', added = ? WHERE {OWN_PENDING_UPLOAD}",
+                                             (_utc_now(), digest, *owner)).rowcount > 0
+            finally:
+                if claimed and not saved:
+                    with self._transaction(conn):
+                        if conn.execute(f"SELECT 1 FROM uploads WHERE {OWN_PENDING_UPLOAD}", (digest, *owner)).fetchone():
+                            self._remove(conn, digest)
+
+    def append(self, df, digest, name='', model_version=''):
+        for _ in self.save_chunks([df], digest, name, model_version):
+            pass
+
+    def _append(self, conn, df, digest):
+        # df is a chunk that has been through preprocess_dataframe
+        if 'hashtags' in df.columns:
+            # Already extracted by preprocess_dataframe
+            hashtags = [list(dict.fromkeys(tags)) for tags in df['hashtags']]
+        else:
+            hashtags = tweet_hashtags(df['Tweet_Content'].astype(str))
+        timestamps = pd.to_datetime(df['Tweet_Timestamp']).dt.strftime('%Y-%m-%d %H:%M:%S')
+        dates = pd.to_datetime(df['Tweet_Timestamp']).dt.strftime('%Y-%m-%d')
+        # Safe across processes only because _transaction() took the write lock before this read
+        start = conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM tweets").fetchone()[0]
+        ids = range(start, start + len(df))
+        conn.executemany("INSERT INTO tweets VALUES (?, ?, ?, ?, ?, ?, ?, ?)", zip(
+            ids, [digest] * len(df), timestamps, dates, df['Cleaned_Tweet'].astype(str),
+            df['sentiment'], df['sentiment_score'].astype(float), (' '.join(tags) for tags in hashtags)))
+
+        tagged = pd.DataFrame({'tweet_id': ids, 'hashtag': hashtags, 'date': dates.to_numpy(),
+                               'sentiment': df['sentiment'].to_numpy(),
+                               'sentiment_score': df['sentiment_score'].to_numpy()}).explode('hashtag')
+        tagged = tagged.dropna(subset=['hashtag'])
+        conn.executemany("INSERT INTO tweet_hashtags VALUES (?, ?, ?)",
+                         tagged[['hashtag', 'date', 'tweet_id']].itertuples(index=False))
+
+        # Fold the chunk into the per-day aggregates
+        daily = pd.DataFrame({'date': dates.to_numpy(), 'sentiment': df['sentiment'].to_numpy(),
+                              'sentiment_score': df['sentiment_score'].to_numpy()})
+        daily = daily.groupby(['date', 'sentiment'])['sentiment_score'].agg(['count', 'sum']).reset_index()
+        conn.executemany("""
+            INSERT INTO daily VALUES (?, ?, ?, ?)
+            ON CONFLICT (date, sentiment) DO UPDATE
+            SET count = count + excluded.count, score_sum = score_sum + excluded.score_sum
+        """, daily.itertuples(index=False))
+        daily_hashtags = tagged.groupby(['hashtag', 'date', 'sentiment'])['sentiment_score'].agg(['count', 'sum'])
+        conn.executemany("""
+            INSERT INTO daily_hashtags VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (hashtag, date, sentiment) DO UPDATE
+            SET count = count + excluded.count, score_sum = score_sum + excluded.score_sum
+        """, daily_hashtags.reset_index().itertuples(index=False))
+
+    def _remove_abandoned(self, conn):
+        # Take out pending uploads whose process stopped while saving them: on
+        # this host once the owner pid is gone, anywhere once it has not
+        # committed a chunk for STALE_UPLOAD_SECONDS
+        host = socket.gethostname()
+        cutoff = (datetime.now(timezone.utc) - timedelta(seconds=STALE_UPLOAD_SECONDS)).isoformat(timespec='seconds')
+        pending = conn.execute("SELECT digest, owner_host, owner_pid, COALESCE(updated, added) FROM uploads"
+                               " WHERE status = 'pending'").fetchall()
+        for digest, owner_host, owner_pid, updated in pending:
+            if updated < cutoff or (owner_host == host and not _process_alive(owner_pid)):
+                self._remove(conn, digest)
+
+    def _remove(self, conn, digest):
+        # Take an upload's tweets out of the store and its aggregates
+        removed = pd.read_sql_query("""
+            SELECT COUNT(*) AS count, SUM(sentiment_score) AS score_sum, date, sentiment
+            FROM tweets WHERE upload = ? GROUP BY date, sentiment
+        """, conn, params=(digest,))
+        conn.executemany("UPDATE daily SET count = count - ?, score_sum = score_sum - ? WHERE date = ? AND sentiment = ?",
+                         removed.itertuples(index=False))
+        removed = pd.read_sql_query("""
+            SELECT COUNT(*) AS count, SUM(t.sentiment_score) AS score_sum, h.hashtag, t.date, t.sentiment
+            FROM tweet_hashtags h JOIN tweets t ON t.id = h.tweet_id
+            WHERE t.upload = ? GROUP BY h.hashtag, t.date, t.sentiment
+        """, conn, params=(digest,))
+        conn.executemany("""
+            UPDATE daily_hashtags SET count = count - ?, score_sum = score_sum - ?
+            WHERE hashtag = ? AND date = ? AND sentiment = ?
+        """, removed.itertuples(index=False))
+        conn.execute("DELETE FROM daily WHERE count <= 0")
+        conn.execute("DELETE FROM daily_hashtags WHERE count <= 0")
+        conn.execute("DELETE FROM tweet_hashtags WHERE tweet_id IN (SELECT id FROM tweets WHERE upload = ?)", (digest,))
+        conn.execute("DELETE FROM tweets WHERE upload = ?", (digest,))
+        conn.execute("DELETE FROM uploads WHERE digest = ?", (digest,))
+
+    # Queries. start and end are dates (inclusive) or None for an open range.
+
+    def _query_daily(self, select, group_by, start=None, end=None, hashtag=None, order_by=None, limit=None):
+        table = 'daily_hashtags' if hashtag is not None else 'daily'
+        clauses, params = _date_filter('date', start, end)
+        if hashtag is not None:
+            clauses.insert(0, "hashtag = ?")
+            params.insert(0, hashtag.lower())
+        sql = f"SELECT {select} FROM {table}"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += f" GROUP BY {group_by}"
+        if order_by:
+            sql += f" ORDER BY {order_by}"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        with closing(self.connect()) as conn:
+            return pd.read_sql_query(sql, conn, params=params)
+
+    def date_range(self):
+        with closing(self.connect()) as conn:
+            first, last = conn.execute("SELECT MIN(date), MAX(date) FROM daily").fetchone()
+        if first is None:
+            return None, None
+        return pd.Timestamp(first).date(), pd.Timestamp(last).date()
+
+    def daily_sentiment(self, start=None, end=None, hashtag=None):
+        # Same shape as DashboardAggregates.daily_sentiment()
+        df = self._query_daily("date, SUM(score_sum) / SUM(count) AS sentiment_score", 'date',
+                               start, end, hashtag, order_by='date')
+        df['date'] = pd.to_datetime(df['date']).dt.date
+        return df
+
+    def tweet_volume(self, start=None, end=None, hashtag=None):
+        df = self._query_daily("date, SUM(count) AS count", 'date', start, end, hashtag, order_by='date')
+        df['date'] = pd.to_datetime(df['date']).dt.date
+        return df
+
+    def sentiment_distribution(self, start=None, end=None, hashtag=None):
+        df = self._query_daily("sentiment, SUM(count) AS count", 'sentiment', start, end, hashtag,
+                               order_by='count DESC')
+        return pd.Series(df['count'].to_numpy(), index=df['sentiment'].to_numpy(), name='count', dtype='int64')
+
+    def top_hashtags(self, n=10, start=None, end=None):
+        clauses, params = _date_filter('date', start, end)
+        sql = "SELECT hashtag, SUM(count) AS count FROM daily_hashtags"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += f" GROUP BY hashtag ORDER BY count DESC LIMIT {int(n)}"
+        with closing(self.connect()) as conn:
+            df = pd.read_sql_query(sql, conn, params=params)
+        return pd.Series(df['count'].to_numpy(), index=df['hashtag'].to_numpy(), name='count', dtype='int64')
+
+    def tweets(self, start=None, end=None, hashtag=None, limit=1000):
+        # Row-level lookup through the date or hashtag index
+        clauses, params = _date_filter('t.date', start, end)
+        sql = "SELECT t.timestamp, t.date, t.cleaned, t.sentiment, t.sentiment_score, t.hashtags FROM tweets t"
+        if hashtag is not None:
+            sql += " JOIN tweet_hashtags h ON h.tweet_id = t.id"
+            hashtag_clauses, hashtag_params = _date_filter('h.date', start, end)
+            clauses = ["h.hashtag = ?"] + hashtag_clauses
+            params = [hashtag.lower()] + hashtag_params
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += f" ORDER BY t.timestamp LIMIT {int(limit)}"
+        with closing(self.connect()) as conn:
+            return pd.read_sql_query(sql, conn, params=params)
+
+
+_stores = {}
+
+
+# Process-wide store per path
+def get_store(path=DEFAULT_STORE_PATH):
+    if path not in _stores:
+        _stores[path] = TweetStore(path)
+    return _stores[path]
@@ -0,0 +1,355 @@
+import io
+import re
+import tempfile
+import threading
+from collections import Counter, defaultdict
+
+import pandas as pd
+
+import sketches
+from instrumentation import NULL_RECORDER
+from text_processing import HASHTAG_PATTERN
+
+DEFAULT_CHUNK_SIZE = 50000
+# A smaller first chunk gets the first partial results of a long run on screen sooner
+FIRST_CHUNK_SIZE = 5000
+ANALYZER_PREVIEW_ROWS = 10000
+# The Analyzer's scored rows stay in memory up to this size, then spill to a temporary file
+SPOOL_MEMORY_BYTES = 32 * 2 ** 20
+# Larger scored files are left to cli.py rather than read back into memory for a download
+MAX_DOWNLOAD_BYTES = 256 * 2 ** 20
+# The WordCloud's own word pattern (for the default min_word_length)
+CLOUD_WORD_PATTERN = re.compile(r"\w[\w']*")
+
+
+# Read a CSV in chunks of at most chunksize rows (the first one of at most first_chunksize rows)
+def iter_csv_chunks(source, chunksize=DEFAULT_CHUNK_SIZE, first_chunksize=None, **read_csv_kwargs):
+    reader = pd.read_csv(source, chunksize=chunksize, **read_csv_kwargs)
+    if first_chunksize is None or first_chunksize >= chunksize:
+        return reader
+    return _with_first_chunk(reader, first_chunksize)
+
+
+def _with_first_chunk(reader, first_chunksize):
+    with reader:
+        try:
+            yield reader.get_chunk(first_chunksize)
+        except StopIteration:
+            return
+        yield from reader
+
+
+# Read JSON Lines in chunks of at most chunksize records
+def iter_jsonl_chunks(source, chunksize=DEFAULT_CHUNK_SIZE):
+    return pd.read_json(source, lines=True, chunksize=chunksize)
+
+
+# Read a text file line by line, yielding chunks as single-column 'Text' DataFrames
+def iter_text_chunks(source, chunksize=DEFAULT_CHUNK_SIZE, encoding='utf-8', first_chunksize=None):
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    lines = io.TextIOWrapper(source, encoding=encoding) if not isinstance(source, io.TextIOBase) else source
+    buffer = []
+    start = 0
+    size = min(first_chunksize or chunksize, chunksize)
+    try:
+        for line in lines:
+            buffer.append(line.rstrip('\n'))
+            if len(buffer) >= size:
+                # Keep a running index, like pd.read_csv does across chunks
+                yield pd.DataFrame({'Text': buffer}, index=range(start, start + len(buffer)))
+                start += len(buffer)
+                buffer = []
+                size = chunksize
+        if buffer:
+            yield pd.DataFrame({'Text': buffer}, index=range(start, start + len(buffer)))
+    finally:
+        if lines is not source:
+            # Don't let the wrapper close the caller's file
+            lines.detach()
+
+
+class TokenFrequencies:
+    # Whitespace-token counts for a corpus, built with a single split() per text.
+    # Hashtags, top words and word cloud frequencies are all derived from these
+    # counts, so the derivations cost one pass over the vocabulary, not the corpus.
+    # Neither a hashtag nor a WordCloud word can span whitespace, so deriving
+    # them token by token gives the same counts as scanning the joined text.
+
+    def __init__(self):
+        self.counts = Counter()
+
+    def __len__(self):
+        return len(self.counts)
+
+    def update(self, texts):
+        counts = self.counts
+        for text in texts:
+            counts.update(text.split())
+        return self
+
+    def merge(self, other):
+        self.counts.update(other.counts)
+        return self
+
+    def lowercase(self):
+        folded = Counter()
+        for token, count in self.counts.items():
+            folded[token.lower()] += count
+        return folded
+
+    def hashtags(self):
+        hashtags = Counter()
+        for token, count in self.lowercase().items():
+            if '#' in token:
+                for hashtag in HASHTAG_PATTERN.findall(token):
+                    hashtags[hashtag] += count
+        return hashtags
+
+    def words(self, stop_words=(), min_length=4):
+        return Counter({token: count for token, count in self.lowercase().items()
+                        if len(token) >= min_length and token not in stop_words})
+
+    def cloud_words(self, stop_words=None):
+        # Same tokenization as WordCloud.process_text with collocations=False:
+        # drop "'s", numbers and stopwords (cases are merged by cloud_frequencies_from_words)
+        if stop_words is None:
+            from wordcloud import STOPWORDS
+            stop_words = STOPWORDS
+        stop_words = {word.lower() for word in stop_words}
+        words = Counter()
+        for token, count in self.counts.items():
+            for word in CLOUD_WORD_PATTERN.findall(token):
+                if word.lower().endswith("'s"):
+                    word = word[:-2]
+                if word.isdigit() or word.lower() in stop_words:
+                    continue
+                words[word] += count
+        return words
+
+    def cloud_frequencies(self, stop_words=None, normalize_plurals=True):
+        return cloud_frequencies_from_words(self.cloud_words(stop_words), normalize_plurals)
+
+
+# Merge plurals and keep the most common case of each word, as WordCloud.process_text does
+def cloud_frequencies_from_words(words, normalize_plurals=True):
+    cases = defaultdict(Counter)
+    for word, count in words.items():
+        cases[word.lower()][word] += count
+    if normalize_plurals:
+        for key in list(cases):
+            if key.endswith('s') and not key.endswith('ss') and key[:-1] in cases:
+                singular = cases[key[:-1]]
+                for word, count in cases.pop(key).items():
+                    singular[word[:-1]] += count
+    return {case_counts.most_common(1)[0][0]: sum(case_counts.values()) for case_counts in cases.values()}
+
+
+class DashboardAggregates:
+    # Running aggregates behind the six dashboard charts. Chunks are folded in
+    # with update() and discarded, so memory depends on the number of distinct
+    # dates and tokens rather than on the number of tweets.
+    #
+    # With sketch_error set, the hashtag, word and word cloud tables are kept in
+    # fixed-size sketches.FrequentItems summaries instead of exact counts of every
+    # token: each chunk's exact tables are folded in and the chunk's counts dropped,
+    # so memory no longer grows with the vocabulary. Reported counts are then
+    # underestimates by at most sketch_error times the number of counted tokens.
+
+    def __init__(self, stop_words=(), sketch_error=None):
+        self.stop_words = set(stop_words)
+        self.rows = 0
+        self.daily_score_sum = defaultdict(float)
+        self.daily_volume = Counter()
+        self.sentiment_counts = Counter()
+        self.sketch_error = sketch_error
+        if sketch_error is None:
+            self.tokens = TokenFrequencies()
+            # Hashtags of chunks that came with a hashtags column
+            self.hashtag_counts = Counter()
+        else:
+            self.tokens = None
+            self.sketches = {name: sketches.FrequentItems(error_ratio=sketch_error)
+                             for name in ('hashtags', 'words', 'cloud')}
+        # Derived token tables, dropped whenever more tokens are folded in
+        self._derived = {}
+
+    def update(self, df):
+        # df is a chunk that has been through preprocess_dataframe
+        self.rows += len(df)
+        self.update_daily(df)
+        self.update_sentiment(df)
+        # preprocess_dataframe has already found the hashtags, so they are counted from its column
+        self.update_tokens(df['Tweet_Content'].astype(str), df['hashtags'] if 'hashtags' in df.columns else None)
+        return self
+
+    def update_daily(self, df):
+        daily = df.groupby('date')['sentiment_score'].agg(['sum', 'count'])
+        for date, row in daily.iterrows():
+            self.daily_score_sum[date] += row['sum']
+            self.daily_volume[date] += int(row['count'])
+
+    def update_sentiment(self, df):
+        self.sentiment_counts.update(df['sentiment'].value_counts().to_dict())
+
+    def update_tokens(self, content, hashtags=None):
+        # hashtags, each tweet's list of lower-cased hashtags, or None to read them from the tokens.
+        # Give it for every chunk or for none of them.
+        chunk_hashtags = Counter(tag for tags in hashtags for tag in tags) if hashtags is not None else None
+        if self.tokens is not None:
+            self.tokens.update(content)
+            if chunk_hashtags is not None:
+                self.hashtag_counts.update(chunk_hashtags)
+        else:
+            chunk_tokens = TokenFrequencies().update(content)
+            self.sketches['hashtags'].update(chunk_hashtags if chunk_hashtags is not None else chunk_tokens.hashtags())
+            self.sketches['words'].update(chunk_tokens.words(self.stop_words))
+            self.sketches['cloud'].update(chunk_tokens.cloud_words())
+        self._derived.clear()
+
+    def _derive(self, name, build):
+        if name not in self._derived:
+            self._derived[name] = build()
+        return self._derived[name]
+
+    def daily_sentiment(self):
+        dates = sorted(self.daily_volume)
+        return pd.DataFrame({
+            'date': dates,
+            'sentiment_score': [self.daily_score_sum[date] / self.daily_volume[date] for date in dates],
+        })
+
+    def tweet_volume(self):
+        dates = sorted(self.daily_volume)
+        return pd.DataFrame({'date': dates, 'count': [self.daily_volume[date] for date in dates]})
+
+    def sentiment_distribution(self):
+        return pd.Series(dict(self.sentiment_counts.most_common()), name='count', dtype='int64')
+
+    def top_hashtags(self, n=10):
+        if self.tokens is None:
+            return self.sketches['hashtags'].top(n)
+        hashtags = self.hashtag_counts or self._derive('hashtags', self.tokens.hashtags)
+        return pd.Series(dict(hashtags.most_common(n)), name='count', dtype='int64')
+
+    def top_words(self, n=20):
+        if self.tokens is None:
+            return self.sketches['words'].top(n)
+        words = self._derive('words', lambda: self.tokens.words(self.stop_words))
+        return pd.Series(dict(words.most_common(n)), name='count', dtype='int64')
+
+    def word_cloud_frequencies(self):
+        if self.tokens is None:
+            return self._derive('cloud', lambda: cloud_frequencies_from_words(self.sketches['cloud'].counts))
+        return self._derive('cloud', self.tokens.cloud_frequencies)
+
+    def merge(self, other):
+        # Fold in the aggregates of another part of the same corpus (same stop words and mode)
+        self.rows += other.rows
+        for date, score_sum in other.daily_score_sum.items():
+            self.daily_score_sum[date] += score_sum
+        self.daily_volume.update(other.daily_volume)
+        self.sentiment_counts.update(other.sentiment_counts)
+        if self.tokens is not None:
+            self.tokens.merge(other.tokens)
+            self.hashtag_counts.update(other.hashtag_counts)
+        else:
+            for name, sketch in self.sketches.items():
+                sketch.merge(other.sketches[name])
+        self._derived.clear()
+        return self
+
+
+# Preprocess and fold every chunk into one set of aggregates
+# (process_chunk=None for chunks that are already preprocessed)
+def aggregate_chunks(chunks, process_chunk=None, aggregates=None, recorder=NULL_RECORDER):
+    aggregates = aggregates if aggregates is not None else DashboardAggregates()
+    for chunk in chunks:
+        chunk = process_chunk(chunk) if process_chunk is not None else chunk
+        with recorder.stage('aggregate', rows=len(chunk)):
+            aggregates.update(chunk)
+    return aggregates
+
+
+# Add the Analyzer tab's Sentiment, Score and Emoticon columns to a chunk.
+# score is a callable taking a Series of texts and returning a score_series frame.
+def score_chunk(chunk, text_column, score):
+    scores = score(chunk[text_column])
+    # Create new columns for sentiment, score and emoticon
+    chunk['Sentiment'] = scores['label']
+    chunk['Score'] = scores['compound']
+    chunk['Emoticon'] = scores['emoticon']
+    return chunk
+
+
+class CsvSpool:
+    # Chunks of rows appended as one CSV, kept in memory up to max_size bytes and
+    # in a temporary file after that. The file is deleted with the spool.
+    # Appending and reading may happen on different threads.
+
+    def __init__(self, max_size=SPOOL_MEMORY_BYTES):
+        self.file = tempfile.SpooledTemporaryFile(max_size=max_size)
+        self.rows = 0
+        self.size = 0
+        self._header = True
+        self._lock = threading.Lock()
+
+    def write(self, df):
+        data = df.to_csv(index=False, header=self._header).encode('utf-8')
+        with self._lock:
+            self.file.write(data)
+            self.rows += len(df)
+            self.size += len(data)
+            self._header = False
+
+    def getvalue(self):
+        # The CSV written so far, read into memory
+        with self._lock:
+            position = self.file.tell()
+            self.file.seek(0)
+            data = self.file.read()
+            self.file.seek(position)
+        return data
+
+
+class AnalyzerResults:
+    # Running Analyzer tab results: sentiment counts over every scored chunk,
+    # a preview of at most preview_rows rows and every scored row in a CsvSpool,
+    # so large files can be downloaded in full without being held as a DataFrame.
+
+    def __init__(self, preview_rows=ANALYZER_PREVIEW_ROWS):
+        self.preview_rows = preview_rows
+        self.previews = []
+        self.kept = 0
+        self.total = 0
+        self.sentiment_counts = Counter()
+        self.scored = CsvSpool()
+
+    def update(self, chunk):
+        # chunk has been through score_chunk
+        self.sentiment_counts.update(chunk['Sentiment'].value_counts().to_dict())
+        self.total += len(chunk)
+        self.scored.write(chunk)
+        if self.kept < self.preview_rows:
+            self.previews.append(chunk.head(self.preview_rows - self.kept))
+            self.kept += len(self.previews[-1])
+        return self
+
+    def results(self):
+        # (preview, sentiment counts, total rows, CsvSpool of every scored row)
+        preview = pd.concat(self.previews) if self.previews else pd.DataFrame()
+        counts = pd.Series(dict(self.sentiment_counts.most_common()), name='count', dtype='int64')
+        return preview, counts, self.total, self.scored
+
+
+def score_chunks(chunks, text_column, score):
+    for chunk in chunks:
+        yield score_chunk(chunk, text_column, score)
+
+
+# Score chunks for the Analyzer tab, keeping a bounded preview of the rows and spooling all of them
+def analyze_chunks(chunks, text_column, score, preview_rows=ANALYZER_PREVIEW_ROWS):
+    results = AnalyzerResults(preview_rows)
+    for chunk in score_chunks(chunks, text_column, score):
+        results.update(chunk)
+    return results.results()
@@ -0,0 +1,115 @@
+# FrequentItems and the sketch mode of DashboardAggregates against exact counts.
+# Run from the repository root: python -m pytest
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import sketches
+import streaming
+
+STOP_WORDS = {'the', 'and'}
+
+
+# Zipf-distributed items, so a few are frequent and most occur once or twice
+def long_tail(size, seed=0):
+    return [f"item{rank}" for rank in np.random.default_rng(seed).zipf(1.3, size)]
+
+
+def long_tail_tweets(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    words = rng.zipf(1.2, rows * 8).reshape(rows, 8)
+    hashtags = rng.zipf(1.2, rows)
+    return pd.Series([' '.join([f"word{rank}" for rank in ranks] + [f"#Tag{hashtag}", 'the'])
+                      for ranks, hashtag in zip(words, hashtags)])
+
+
+def chunked(items, size):
+    return [Counter(items[start:start + size]) for start in range(0, len(items), size)]
+
+
+def assert_within_bounds(sketch, exact):
+    assert sketch.total == sum(exact.values())
+    assert len(sketch) <= sketch.capacity
+    assert sketch.error <= sketch.total / (sketch.capacity + 1)
+    for item, count in exact.items():
+        lower, upper = sketch.estimate(item)
+        assert lower <= count <= upper, (item, count, lower, upper)
+        if count > sketch.error:
+            # Every item occurring more often than the error is kept
+            assert item in sketch.counts, item
+
+
+def test_capacity_for():
+    assert sketches.capacity_for(0.01) == 99
+    assert sketches.capacity_for(0.6) == 1
+    with pytest.raises(ValueError):
+        sketches.capacity_for(0)
+
+
+def test_counts_are_exact_below_capacity():
+    exact = Counter(long_tail(2000))
+    sketch = sketches.FrequentItems(capacity=len(exact))
+    for counts in chunked(long_tail(2000), 300):
+        sketch.update(counts)
+    assert sketch.error == 0
+    assert sketch.counts == dict(exact)
+
+
+@pytest.mark.parametrize('capacity', [10, 100, 1000])
+def test_update_stays_within_error_bound(capacity):
+    items = long_tail(50000)
+    sketch = sketches.FrequentItems(capacity=capacity)
+    for counts in chunked(items, 1000):
+        sketch.update(counts)
+    assert_within_bounds(sketch, Counter(items))
+    assert sketch.error > 0
+
+
+def test_merge_stays_within_error_bound():
+    items = long_tail(50000, seed=1)
+    parts = [sketches.FrequentItems(capacity=100) for _ in range(4)]
+    for index, counts in enumerate(chunked(items, 2000)):
+        parts[index % len(parts)].update(counts)
+    merged = parts[0]
+    for part in parts[1:]:
+        merged.merge(part)
+    assert_within_bounds(merged, Counter(items))
+
+
+def test_top_is_most_common_first():
+    sketch = sketches.FrequentItems(capacity=10).update({'a': 5, 'b': 9, 'c': 1})
+    assert list(sketch.top(2).index) == ['b', 'a']
+    assert sketch.top(2).tolist() == [9, 5]
+
+
+def test_dashboard_aggregates_sketch_matches_exact_counts():
+    pytest.importorskip('wordcloud')
+    texts = long_tail_tweets(20000)
+    exact = streaming.DashboardAggregates(stop_words=STOP_WORDS)
+    approx = streaming.DashboardAggregates(stop_words=STOP_WORDS, sketch_error=0.001)
+    for start in range(0, len(texts), 2500):
+        exact.update_tokens(texts[start:start + 2500])
+        approx.update_tokens(texts[start:start + 2500])
+
+    exact_counts = {'hashtags': exact.tokens.hashtags(), 'words': exact.tokens.words(STOP_WORDS)}
+    approx_tables = {'hashtags': approx.top_hashtags(10), 'words': approx.top_words(20)}
+    for name, table in approx_tables.items():
+        sketch = approx.sketches[name]
+        assert sketch.error <= 0.001 * sketch.total
+        for item, count in table.items():
+            assert exact_counts[name][item] - sketch.error <= count <= exact_counts[name][item]
+        # Items ahead of the next one by more than the error are in the approximate top n
+        ranked = exact_counts[name].most_common(len(table) + 1)
+        threshold = ranked[-1][1]
+        for item, count in ranked[:-1]:
+            if count - sketch.error > threshold:
+                assert item in table.index, (name, item)
+    assert 'the' not in approx_tables['words'].index
+
+    # Word cloud frequencies are underestimates of the exact ones by at most the error
+    exact_cloud = exact.word_cloud_frequencies()
+    error = approx.sketches['cloud'].error
+    for word, count in approx.word_cloud_frequencies().items():
+        assert exact_cloud[word] - error <= count <= exact_cloud[word]
@@ -0,0 +1,236 @@
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+import emoji
+
+DEFAULT_LEMMA_CACHE_SIZE = 100000
+HASHTAG_PATTERN = re.compile(r'#\w+')
+VARIATION_SELECTORS = ('\ufe0e', '\ufe0f')
+
+# What TextNormalizer.extract finds in one tweet. cleaned is the preprocess() output,
+# hashtags are lower-cased like the dashboard's, emojis are the emoji as written.
+TweetFeatures = namedtuple('TweetFeatures', ['cleaned', 'hashtags', 'mentions', 'url_count', 'emojis'])
+
+# Contractions NLTK's word_tokenize splits even without punctuation (e.g. "gonna" -> "gon na").
+# Once punctuation is stripped these are the only places it differs from str.split().
+TOKEN_SPLITS = {
+    'cannot': ('can', 'not'),
+    'gimme': ('gim', 'me'),
+    'gonna': ('gon', 'na'),
+    'gotta': ('got', 'ta'),
+    'lemme': ('lem', 'me'),
+    'wanna': ('wan', 'na'),
+}
+
+
+class EmojiLookup:
+    # emoji.demojize as a precomputed table: a trie of every emoji with its
+    # ":name:" replacement. Only non-ASCII characters can start (or, for keycaps
+    # like "1\ufe0f\u20e3", continue) an emoji, so the regex engine skips the ASCII
+    # text in between instead of it being walked character by character.
+    START_PATTERN = re.compile(r'[^\x00-\x7f]')
+
+    def __init__(self):
+        self.tree = {}
+        for code_points, data in emoji.EMOJI_DATA.items():
+            node = self.tree
+            for char in code_points:
+                node = node.setdefault(char, {})
+            # Untranslated emoji are kept as they are, as demojize does
+            node[None] = data['en'] if 'en' in data else code_points
+        self.ascii_starts = frozenset(char for char in self.tree if char.isascii())
+
+    def _match(self, text, start):
+        # (end, replacement) of the emoji starting at start, or None. Like demojize, this follows
+        # the longest path through the trie and only matches if it ends on a complete emoji.
+        node = self.tree.get(text[start])
+        if node is None:
+            return None
+        end = start + 1
+        length = len(text)
+        while end < length and text[end] in node:
+            node = node[text[end]]
+            end += 1
+        return (end, node[None]) if None in node else None
+
+    def demojize(self, text, found=None):
+        # Same result as emoji.demojize(text); the emoji replaced are appended to found
+        if text.isascii():
+            return text
+        parts = []
+        position = 0
+        match = self.START_PATTERN.search(text)
+        while match is not None:
+            start = match.start()
+            emoji_match = None
+            # A keycap starts with the ASCII character before its first non-ASCII one
+            if start > position and text[start - 1] in self.ascii_starts:
+                emoji_match = self._match(text, start - 1)
+                if emoji_match is not None:
+                    start -= 1
+            if emoji_match is None:
+                emoji_match = self._match(text, start)
+            parts.append(text[position:start])
+            if emoji_match is not None:
+                position, replacement = emoji_match
+                parts.append(replacement)
+                if found is not None:
+                    found.append(text[start:position])
+            else:
+                # Not an emoji: keep the character, unless it is a stray variation selector
+                if text[start] not in VARIATION_SELECTORS:
+                    parts.append(text[start])
+                position = start + 1
+            match = self.START_PATTERN.search(text, position)
+        parts.append(text[position:])
+        return ''.join(parts)
+
+
+_emoji_lookup = None
+
+
+def get_emoji_lookup():
+    global _emoji_lookup
+    if _emoji_lookup is None:
+        _emoji_lookup = EmojiLookup()
+    return _emoji_lookup
+
+
+class TextNormalizer:
+    # Cleans tweets for scoring and the dashboard. Build one and reuse it:
+    # stopwords are read once, regexes are compiled once and lemmas are cached.
+
+    NON_WORD_PATTERN = re.compile(r'[^\w\s]')
+    # URLs (http\S+|www\S+|https\S+), mentions and '#' in one scan. Removing them in a single
+    # pass gives the same text as removing URLs first: a mention stops where a URL would start.
+    URL_OR_MENTION_PATTERN = re.compile(r'(?:http|www)\S+|@(?:(?!(?:http|www)\S)\w)+')
+    SCAN_PATTERN = re.compile(r'(?P<url>(?:http|www)\S+)|(?P<mention>@(?:(?!(?:http|www)\S)\w)+)|#')
+
+    def __init__(self, stop_words=None, lemma_cache_size=DEFAULT_LEMMA_CACHE_SIZE):
+        self._stop_words = frozenset(stop_words) if stop_words is not None else None
+        self._lemma_cache_size = lemma_cache_size
+        self._lemmatize = None
+
+    # NLTK is slow to import, so it is only loaded once text is actually preprocessed
+
+    @property
+    def stop_words(self):
+        if self._stop_words is None:
+            from nltk.corpus import stopwords
+            self._stop_words = frozenset(stopwords.words('english'))
+        return self._stop_words
+
+    @property
+    def lemmatize(self):
+        # One shared lemmatizer behind a bounded token -> lemma cache
+        if self._lemmatize is None:
+            from nltk.stem import WordNetLemmatizer
+            self._lemmatize = lru_cache(maxsize=self._lemma_cache_size)(WordNetLemmatizer().lemmatize)
+        return self._lemmatize
+
+    def lemma_cache_info(self):
+        return self.lemmatize.cache_info()
+
+    def tokenize(self, text):
+        # Equivalent to word_tokenize for text that has had punctuation removed
+        tokens = []
+        for token in text.split():
+            split = TOKEN_SPLITS.get(token)
+            if split is None:
+                tokens.append(token)
+            else:
+                tokens.extend(split)
+        return tokens
+
+    def clean_tweet(self, tweet):
+        # Remove URLs and user @ references
+        return self.URL_OR_MENTION_PATTERN.sub('', tweet).strip()
+
+    def scan(self, text):
+        # extract() up to tokenizing: (lower-cased text with URLs, mentions, emoji and
+        # punctuation replaced, hashtags, mentions, URL count, emojis) of a str
+        # Convert to lowercase
+        text = text.lower()
+
+        # Drop URLs, user @ references and '#' from hashtags, noting what was found
+        hashtags = []
+        mentions = []
+        url_count = 0
+        if '#' in text or '@' in text or 'http' in text or 'www' in text:
+            parts = []
+            position = 0
+            for match in self.SCAN_PATTERN.finditer(text):
+                start, end = match.span()
+                parts.append(text[position:start])
+                position = end
+                kind = match.lastgroup
+                if kind == 'url':
+                    url_count += 1
+                    # Hashtags are counted wherever they appear, as the dashboard does
+                    if '#' in match.group():
+                        hashtags.extend(HASHTAG_PATTERN.findall(match.group()))
+                elif kind == 'mention':
+                    mentions.append(match.group())
+                else:
+                    hashtag = HASHTAG_PATTERN.match(text, start)
+                    if hashtag is not None:
+                        hashtags.append(hashtag.group())
+            parts.append(text[position:])
+            text = ''.join(parts)
+
+        # Replace emojis with their text description, on the remaining text so emoji
+        # brought together by the removals are read as demojize would
+        emojis = []
+        text = get_emoji_lookup().demojize(text, emojis)
+
+        # Remove non-alphanumeric characters
+        text = self.NON_WORD_PATTERN.sub('', text)
+        return text, hashtags, mentions, url_count, emojis
+
+    def extract(self, text):
+        # Cleaned text, hashtags, mentions, URL count and emoji of a tweet from one scan
+        if not isinstance(text, str):
+            return TweetFeatures(str(text), [], [], 0, [])
+        text, hashtags, mentions, url_count, emojis = self.scan(text)
+
+        # Tokenize, remove stopwords and lemmatize the remaining tokens
+        stop_words = self.stop_words
+        lemmatize = self.lemmatize
+        cleaned = ' '.join(lemmatize(word) for word in self.tokenize(text) if word not in stop_words)
+        return TweetFeatures(cleaned, hashtags, mentions, url_count, emojis)
+
+    def preprocess(self, text):
+        return self.extract(text).cleaned
+
+    def clean_tweets(self, tweets):
+        return [self.clean_tweet(tweet) for tweet in tweets]
+
+    def preprocess_batch(self, texts):
+        return [self.preprocess(text) for text in texts]
+
+    def extract_batch(self, texts):
+        return [self.extract(text) for text in texts]
+
+
+_default_normalizer = None
+
+
+# Shared normalizer for the current process
+def get_normalizer():
+    global _default_normalizer
+    if _default_normalizer is None:
+        _default_normalizer = TextNormalizer()
+    return _default_normalizer
+
+
+def clean_tweet(tweet):
+    return get_normalizer().clean_tweet(tweet)
+
+
+def preprocess_text(text):
+    return get_normalizer().preprocess(text)
+
+
+def extract_features(text):
+    return get_normalizer().extract(text)
@@ -1,39 +1,224 @@
+# Time each script run from its very first line
+import time
+run_start = time.perf_counter()
+
+import logging
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
 import pickle
-import re
-from wordcloud import WordCloud
 from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
-import requests
 from streamlit_lottie import st_lottie
 from PIL import Image
 import base64
-import emoji
+import io
 import string
-import nltk
-from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize
-from nltk.stem import WordNetLemmatizer
-import sklearn
-
-# Download required NLTK data
-nltk.download('punkt')
-nltk.download('vader_lexicon')
-nltk.download('stopwords')
-nltk.download('wordnet')
-nltk.download('averaged_perceptron_tagger')
+import uuid
+
+import charts
+import ingest
+import instrumentation
+import jobs
+import live
+import model_cache
+import models
+import parallel
+import pipeline
+import result_cache
+import sketches
+import startup
+import store
+import streaming
+
+# matplotlib and wordcloud are imported by charts when a chart is first drawn,
+# so tabs that never plot don't pay for them on a cold start
+
+logging.basicConfig(level=logging.INFO)
 
 # Set page configuration
 st.set_page_config(page_title="2024 Olympics Sentiment Analyzer", page_icon="🏅", layout="wide")
 
        
-# Load Lottie animations
+# Load Lottie animations from the on-disk cache, with a short-timeout fetch as fallback
 def load_lottieurl(url: str):
-    r = requests.get(url)
-    if r.status_code != 200:
-        return None
-    return r.json()
+    return startup.load_lottie(url)
+
+def show_lottie(lottie_json):
+    if lottie_json is not None:
+        st_lottie(lottie_json, height=200)
+
+# Opt-in multi-core processing, returns the number of worker processes to use
+def parallel_workers_option(key):
+    use_parallel = st.checkbox("Use parallel processing (large files)", key=f"{key}_parallel")
+    if not use_parallel:
+        return 1
+    return st.number_input("Worker processes:", min_value=1, max_value=parallel.default_workers() * 2,
+                           value=parallel.default_workers(), key=f"{key}_workers")
+
+# Files are read in chunks of this many rows, which bounds peak memory
+def chunk_size_option(key):
+    return st.number_input("Rows per chunk:", min_value=1000, value=streaming.DEFAULT_CHUNK_SIZE,
+                           step=1000, key=f"{key}_chunk_size")
+
+# Returns (workers, chunk size, instrumentation recorder); the recorder is a no-op unless timings are requested
+def processing_options(key):
+    with st.expander("Processing options"):
+        workers, chunk_size = parallel_workers_option(key), chunk_size_option(key)
+        record = st.checkbox("Record stage timings", key=f"{key}_timings")
+    return workers, chunk_size, instrumentation.Recorder() if record else instrumentation.NULL_RECORDER
+
+# Fixed-memory approximate top hashtags and words for very large uploads; returns the error bound or None
+def top_k_option(key):
+    with st.expander("Top hashtags and words"):
+        if not st.checkbox("Approximate in fixed memory (very large files)", key=f"{key}_sketch"):
+            return None
+        return st.number_input("Maximum error (share of all counted tokens):", min_value=0.000001, max_value=0.01,
+                               value=sketches.DEFAULT_ERROR, step=0.00005, format="%.6f", key=f"{key}_sketch_error")
+
+# Content digest of the uploads. Each file is hashed once per session (by file_id), not on every rerun.
+def uploads_digest(uploaded_files, key):
+    known = st.session_state.get(f"{key}_upload_digests", {})
+    digests = {upload.file_id: known.get(upload.file_id) or result_cache.file_digest(upload)
+               for upload in uploaded_files}
+    # Only the current uploads are remembered
+    st.session_state[f"{key}_upload_digests"] = digests
+    return result_cache.combine_digests([digests[upload.file_id] for upload in uploaded_files])
+
+# Charts are rendered (and memoized) by the charts module as PNG images, None when there is nothing to draw
+def show_chart(png):
+    if png is None:
+        st.info("No data yet")
+    else:
+        st.image(png, use_column_width=True)
+
+# Per-stage timings of this run, with JSON and Prometheus exports
+def show_performance(recorder, key):
+    if not recorder.enabled:
+        return
+    with st.expander("Performance"):
+        st.dataframe(recorder.frame(), hide_index=True)
+        own_rss, _ = instrumentation.peak_rss_mb()
+        if own_rss is not None:
+            st.caption(f"Peak RSS {own_rss:,.0f} MB")
+        json_column, prometheus_column = st.columns(2)
+        json_column.download_button("Download JSON", recorder.to_json(), file_name="timings.json",
+                                    mime="application/json", key=f"{key}_timings_json")
+        prometheus_column.download_button("Download Prometheus text", recorder.to_prometheus(),
+                                          file_name="timings.prom", mime="text/plain", key=f"{key}_timings_prom")
+
+# Progress, a cancel button and the partial results of a background job, refreshed while it runs.
+# tables(result) copies what render(tables, recorder) draws while the job is between chunks.
+def show_job(job, tables, render, recorder, key):
+    polling = job.running
+
+    @st.fragment(run_every=jobs.DEFAULT_POLL_SECONDS if polling else None)
+    def job_results():
+        running = job.running
+        if polling and not running:
+            # Finished: draw the final results once more with the whole page, without the timer
+            st.rerun()
+        progress = job.progress()
+        if running:
+            progress_column, cancel_column = st.columns([6, 1])
+            progress_column.progress(progress.fraction, text=jobs.progress_text(progress))
+            if cancel_column.button("Cancel", key=f"{key}_cancel"):
+                job.cancel()
+        elif job.state == jobs.CANCELLED:
+            st.warning(f"Cancelled after {progress.rows:,} rows, showing partial results.")
+        elif job.state == jobs.FAILED:
+            st.error(f"Processing stopped after {progress.rows:,} rows: {job.error}")
+        if not job.rows:
+            if running:
+                st.info("Processing the first chunk...")
+            return
+        # Charts are only timed once the job no longer competes with them
+        render(job.read(tables), recorder if not running else instrumentation.NULL_RECORDER)
+        if not running:
+            if job.recorder is not recorder:
+                recorder.merge(job.recorder)
+            show_performance(recorder, key)
+
+    job_results()
+
+# Follow a live feed, scoring only new tweets and redrawing the rolling charts every few seconds
+def show_live_feed(workers):
+    source_kind = st.radio("Feed source:", ["File", "Socket"], horizontal=True, key="live_source")
+    if source_kind == "File":
+        target = st.text_input("JSONL or CSV file to follow:", key="live_path")
+    else:
+        target = st.number_input("Local port:", min_value=1024, max_value=65535, value=live.DEFAULT_PORT,
+                                 key="live_port")
+    window = st.radio("Window:", list(live.WINDOWS), horizontal=True, key="live_window")
+    # Identifies this session to the feeds, so the one it stops watching is closed
+    watcher = st.session_state.setdefault("live_watcher", uuid.uuid4().hex)
+    if not target:
+        live.release_feeds(watcher)
+        return
+    try:
+        # With parallel processing, the feed scores every poll in one process pool of its own
+        feed = live.open_feed(source_kind.lower(), target,
+                              lambda chunk, executor: pipeline.preprocess_dataframe(chunk, loaded_vader, cache=score_cache,
+                                                                                    executor=executor),
+                              workers=workers, watcher=watcher)
+    except OSError as error:
+        st.error(f"Could not open the live feed: {error}")
+        return
+
+    @st.fragment(run_every=live.DEFAULT_POLL_SECONDS)
+    def live_charts():
+        feed.drain()
+        rolling = feed.aggregates.frame(window)
+        st.caption(f"{feed.rows:,} tweets received from {feed.source}")
+        if rolling.empty:
+            st.info("Waiting for tweets...")
+            return
+
+        st.subheader("Sentiment Over Time")
+        show_chart(charts.line_chart(rolling, 'date', 'sentiment_score',
+                                     f"Average Sentiment Score per {window.capitalize()}", "Time (UTC)",
+                                     "Average Sentiment Score", color='#000080'))
+
+        st.subheader("Tweet Volume Over Time")
+        show_chart(charts.line_chart(rolling, 'date', 'count', f"Tweets per {window.capitalize()}", "Time (UTC)",
+                                     "Number of Tweets", color='#FFD700'))
+
+    live_charts()
+
+# Query the persistent tweet store by date range and hashtag
+def show_tweet_store():
+    tweet_store = store.get_store()
+    first, last = tweet_store.date_range()
+    if first is None:
+        st.info("The tweet store is empty. Upload a CSV with \"Save scored tweets to the tweet store\" checked.")
+        return
+    dates = st.date_input("Dates:", value=(first, last), min_value=first, max_value=last, key="store_dates")
+    if len(dates) != 2:
+        # Still picking the end of the range
+        return
+    start, end = dates
+    hashtag = st.selectbox("Hashtag:", ["All hashtags"] + list(tweet_store.top_hashtags(200, start, end).index),
+                           key="store_hashtag")
+    hashtag = None if hashtag == "All hashtags" else hashtag
+
+    tweet_volume = tweet_store.tweet_volume(start, end, hashtag)
+    st.caption(f"{tweet_volume['count'].sum():,} stored tweets")
+
+    st.subheader("Sentiment Distribution")
+    show_chart(charts.bar_chart(tweet_store.sentiment_distribution(start, end, hashtag), "Sentiment Distribution",
+                                "Sentiment", "Count", colormap="viridis"))
+
+    st.subheader("Sentiment Over Time")
+    show_chart(charts.line_chart(tweet_store.daily_sentiment(start, end, hashtag), 'date', 'sentiment_score',
+                                 "Average Sentiment Score Over Time", "Date", "Average Sentiment Score",
+                                 color='#000080'))
+
+    st.subheader("Tweet Volume Over Time")
+    show_chart(charts.line_chart(tweet_volume, 'date', 'count', "Tweet Volume Over Time", "Date",
+                                 "Number of Tweets", color='#FFD700'))
+
+    if hashtag is None:
+        st.subheader("Top Hashtags")
+        show_chart(charts.bar_chart(tweet_store.top_hashtags(10, start, end), "Top 10 Hashtags", "Hashtag",
+                                    "Tweets", colormap="Dark2", rotate=True))
     
 st.markdown("---")
 
@@ -98,9 +283,9 @@ st.markdown(f"""
 with tabs[0]:
     st.title("Welcome to the 2024 Paris Olympics Sentiment Analyzer")
     
-    lottie_url = "https://lottie.host/fe78a580-e21b-4613-b5d6-cc64b1a934b7/vDApSHkH81.json"  
+    lottie_url = startup.LOTTIE_URLS['home']
     lottie_json = load_lottieurl(lottie_url)
-    st_lottie(lottie_json, height=200)
+    show_lottie(lottie_json)
     st.write("Analyze sentiments of the 2024 Paris Olympics with our advanced tool.")
 
  
@@ -108,46 +293,37 @@ with tabs[0]:
 with tabs[1]:
     st.title("Olympic Sentiment Analyzer")
     
-    lottie_url = "https://lottie.host/83213d4d-0fde-4804-86d7-03b17919cf3b/nYDHta6PFS.json"  
+    lottie_url = startup.LOTTIE_URLS['analyzer']
     lottie_json = load_lottieurl(lottie_url)
-    st_lottie(lottie_json, height=200)
-
-     # Load the pickled VADER model
-    with open('Models/vader_model.pkl', 'rb') as vader_file:
-        loaded_vader = pickle.load(vader_file)
-        
-    def clean_tweet(tweet):
-        # Remove URLs
-        tweet = re.sub(r'http\S+|www\S+|https\S+', '', tweet, flags=re.MULTILINE)
-        # Remove user @ references
-        tweet = re.sub(r'\@\w+', '', tweet)
-        return tweet.strip()
-    
-    # Function to get sentiment emoticon
-    def get_sentiment_emoticon(sentiment):
-        emoticons = {
-            "POSITIVE": "😄",
-            "NEUTRAL": "😐",
-            "NEGATIVE": "😞"
-        }
-        return emoticons.get(sentiment, "❓") 
-
-    # Function to analyze sentiment using VADER
-    def analyze_sentiment_vader(text):
-    
-        # Use the VADER model to predict the sentiment
-        vader_scores = loaded_vader.polarity_scores(text)
-        
-        # Determine sentiment based on VADER compound score
-        compound_score = vader_scores['compound']
-        if compound_score >= 0.05:
-            sentiment = 'POSITIVE'
-        elif compound_score <= -0.05:
-            sentiment = 'NEGATIVE'
-        else:
-            sentiment = 'NEUTRAL'
-        
-        return sentiment, compound_score, get_sentiment_emoticon(sentiment)
+    show_lottie(lottie_json)
+
+    # Load the pickled VADER model, cached for the process and reloaded only when the file changes
+    loaded_vader = model_cache.get_vader_model()
+    model_version = model_cache.get_model_version()
+    score_cache = result_cache.get_score_cache(model_version)
+    file_cache = result_cache.get_file_cache()
+
+    def show_cache_stats(cache=score_cache):
+        st.caption(f"{cache.summary()} · {file_cache.summary()}")
+        result_cache.log_hit_rates(cache, file_cache, charts.get_chart_cache())
+
+    # Model selector: the other models are only loaded once picked
+    analyzer_model_name = st.selectbox("Model:", list(models.MODEL_SPECS), key="analyzer_model",
+                                       format_func=lambda name: models.MODEL_SPECS[name]['title'])
+    try:
+        with st.spinner(f"Loading {models.MODEL_SPECS[analyzer_model_name]['title']}..."):
+            analyzer_model = models.get_model(analyzer_model_name)
+            analyzer_version = models.get_model_version(analyzer_model_name)
+    except (OSError, ImportError, LookupError, pickle.UnpicklingError) as error:
+        st.error(f"Could not load {models.MODEL_SPECS[analyzer_model_name]['title']}, using VADER instead: {error}")
+        analyzer_model_name = 'vader'
+        analyzer_model = models.get_model('vader')
+        analyzer_version = models.get_model_version('vader')
+    analyzer_cache = result_cache.get_score_cache(analyzer_version)
+    st.caption(f"{analyzer_model.title} (reported accuracy {models.MODEL_SPECS[analyzer_model_name]['accuracy']:.1%}): "
+               f"{analyzer_model.stats.summary()}")
+    with st.expander("Compare models"):
+        st.dataframe(models.model_comparison(), hide_index=True)
 
     # Option to choose between manual input and file upload
     analysis_option = st.radio("Choose analysis option:", ["Manual Input", "File Upload"])
@@ -157,7 +333,7 @@ with tabs[1]:
         
         if st.button("Analyze"):
             if tweet:
-                label, score, emoticon = analyze_sentiment_vader(tweet)
+                label, score, emoticon = analyzer_model.analyze(tweet)
                 st.markdown(f"""
                 <div style="text-align: center;">
                     <span style="font-size: 100px;">{emoticon}</span>
@@ -172,29 +348,68 @@ with tabs[1]:
         uploaded_file = st.file_uploader("Upload a CSV or TXT file", type=["csv", "txt"])
         
         if uploaded_file is not None:
+            workers, chunk_size, recorder = processing_options("analyzer")
+
             if uploaded_file.name.endswith('.csv'): # .csv file
-                df = pd.read_csv(uploaded_file)
-                text_column = st.selectbox("Select the column containing the text to analyze:", df.columns)
+                # Only the header is needed to pick a column, rows are streamed on analysis
+                uploaded_file.seek(0)
+                columns = pd.read_csv(uploaded_file, nrows=0).columns
+                text_column = st.selectbox("Select the column containing the text to analyze:", columns)
+                read_chunks = lambda source: recorder.iterate('read_csv', streaming.iter_csv_chunks(
+                    source, chunksize=chunk_size, first_chunksize=streaming.FIRST_CHUNK_SIZE))
             else:  # .txt file
-                content = uploaded_file.getvalue().decode("utf-8")
-                df = pd.DataFrame({"Text": content.split('\n')})
                 text_column = "Text"
+                read_chunks = lambda source: recorder.iterate('read_txt', streaming.iter_text_chunks(
+                    source, chunksize=chunk_size, first_chunksize=streaming.FIRST_CHUNK_SIZE))
 
+            # The upload, column and model of the results this session is showing
+            analysis = (uploaded_file.file_id, text_column, analyzer_version)
             if st.button("Analyze File"):
-                # Apply sentiment analysis to each row
-                results = [analyze_sentiment_vader(text) for text in df[text_column]]
-                
-                # Create new columns for sentiment, score and emoticon
-                df['Sentiment'] = [r[0] for r in results]
-                df['Score'] = [r[1] for r in results]
-                df['Emoticon'] = [r[2] for r in results]
+                # Reuse the results of an identical upload, column and model
+                file_key = (uploads_digest([uploaded_file], "analyzer"), 'analyzer', text_column, analyzer_version)
+                st.session_state["analyzer_results"] = (analysis, file_key)
+                cached_results = file_cache.get(file_key)
+                recorder.count('file_cache_hits' if cached_results is not None else 'file_cache_misses')
+                job = jobs.get_job(file_key)
+                if cached_results is None and (job is None or not job.running):
+                    # Score the column one batch per chunk on a background thread (only VADER runs in a process pool,
+                    # one for the whole file, shut down when the job ends)
+                    executor = parallel.make_pool(workers) if workers > 1 and analyzer_model_name == 'vader' else None
+                    if executor is not None:
+                        score = lambda texts: parallel.score_series_parallel(texts, workers=workers, cache=analyzer_cache,
+                                                                             executor=executor)
+                    else:
+                        score = lambda texts: analyzer_model.score_series(texts, cache=analyzer_cache)
+                    score = recorder.timed(f'scoring ({analyzer_model_name})', score)
+                    source = io.BytesIO(uploaded_file.getvalue())
+                    scored_chunks = parallel.shutdown_after(streaming.score_chunks(read_chunks(source), text_column, score),
+                                                            executor)
+                    jobs.forget(file_key)
+                    jobs.submit(file_key, jobs.BackgroundJob(
+                        scored_chunks, streaming.AnalyzerResults(), source=source, recorder=recorder, stage='collect',
+                        on_done=lambda results, file_key=file_key: file_cache.put(file_key, results.results())))
+
+            # download is off while the file is still being scored
+            def show_analyzer_results(results, recorder, download=True):
+                df, sentiment_counts, total_rows, scored_rows = results
 
                 # Display results
                 st.write(df)
+                if total_rows > len(df):
+                    st.caption(f"Showing the first {len(df):,} of {total_rows:,} rows.")
+                if download and scored_rows.size > streaming.MAX_DOWNLOAD_BYTES:
+                    st.caption(f"All {scored_rows.rows:,} scored rows are too large to download from the browser, "
+                               f"score the file with cli.py instead.")
+                elif download and st.button(f"Prepare download of all {scored_rows.rows:,} scored rows",
+                                            key="analyzer_prepare_download"):
+                    # Every scored row, not just the ones shown. The CSV is only read out of the spool
+                    # when asked for, and released again on the next rerun.
+                    st.download_button("Download CSV", scored_rows.getvalue(), file_name="scored_tweets.csv",
+                                       mime="text/csv", key="analyzer_download")
+                show_cache_stats(analyzer_cache)
 
                 # Display summary
                 st.subheader("Summary")
-                sentiment_counts = df['Sentiment'].value_counts()
                 
                 # Map sentiments to colors
                 colors = sentiment_counts.index.map({
@@ -204,12 +419,23 @@ with tabs[1]:
                 })
                 
                 # Create a bar plot color coded as per sentiment
-                fig, ax = plt.subplots()
-                sentiment_counts.plot(kind='bar', ax=ax, color=colors)
-                plt.title("Sentiment Distribution")
-                plt.xlabel("Sentiment")
-                plt.ylabel("Count")
-                st.pyplot(fig)
+                recorder.start_laps()
+                show_chart(charts.bar_chart(sentiment_counts, "Sentiment Distribution", "Sentiment", "Count",
+                                            color=colors))
+                recorder.lap('chart: sentiment distribution')
+
+            # Results of the last analysis of this upload, column and model: live while it is scored, then cached
+            shown_analysis, file_key = st.session_state.get("analyzer_results", (None, None))
+            if shown_analysis == analysis:
+                job = jobs.get_job(file_key)
+                cached_results = file_cache.get(file_key) if job is None else None
+                if job is not None:
+                    show_job(job, lambda results: results.results(),
+                             lambda results, recorder: show_analyzer_results(results, recorder, download=not job.running),
+                             recorder, "analyzer")
+                elif cached_results is not None:
+                    show_analyzer_results(cached_results, recorder)
+                    show_performance(recorder, "analyzer")
 
     st.markdown("---")
 
@@ -217,143 +443,154 @@ with tabs[1]:
 with tabs[2]:
     st.title("Olympics Twitter Sentiment Stats")
     
-    lottie_url = "https://lottie.host/a96d76d8-f260-420f-98be-03cf4f377403/NKKum85jXp.json"  # Olympic stats animation
+    lottie_url = startup.LOTTIE_URLS['dashboard']
     lottie_json = load_lottieurl(lottie_url)
-    st_lottie(lottie_json, height=200)
-
-    def preprocess_text(text):
-        if not isinstance(text, str):
-            return str(text)
-        # Convert to lowercase
-        text = text.lower()
-        
-        # Remove URLs
-        text = re.sub(r'http\S+|www\S+|https\S+', '', text, flags=re.MULTILINE)
-        
-        # Remove user @ references and '#' from hashtags
-        text = re.sub(r'\@\w+|\#', '', text)
-        
-        # Replace emojis with their text description
-        text = emoji.demojize(text)
-        
-        # Remove non-alphanumeric characters
-        text = re.sub(r'[^\w\s]', '', text)
-        
-        # Tokenize the text
-        tokens = word_tokenize(text)
-        
-        # Remove stopwords
-        stop_words = set(stopwords.words('english'))
-        tokens = [word for word in tokens if word not in stop_words]
-        
-        # Lemmatize the tokens
-        lemmatizer = WordNetLemmatizer()
-        tokens = [lemmatizer.lemmatize(word) for word in tokens]
-        
-        # Join the tokens back into a single string
-        cleaned_text = ' '.join(tokens)
-        
-        return cleaned_text
-    
-    def preprocess_dataframe(df):
-        
-        # Preprocess the 'Tweet_Content' column
-        df['Cleaned_Tweet'] = df['Tweet_Content'].apply(preprocess_text)
-        
-        # Convert 'Tweet_Timestamp' to datetime and extract date
-        df['Tweet_Timestamp'] = pd.to_datetime(df['Tweet_Timestamp'])
-        df['date'] = df['Tweet_Timestamp'].dt.date
-        
-        # Apply sentiment analysis
-        df['sentiment'] = df['Cleaned_Tweet'].apply(lambda x: analyze_sentiment_vader(x)[0])
-        df['sentiment_score'] = df['Cleaned_Tweet'].apply(lambda x: analyze_sentiment_vader(x)[1])
-        
-        return df
-
-    uploaded_file = st.file_uploader("Upload a CSV file of The Paris Olympics-related tweets", type=["csv"])
+    show_lottie(lottie_json)
+
+    data_source = st.radio("Data source:", ["Upload", "Live feed", "Tweet store"], horizontal=True,
+                           key="dashboard_source")
+    live_mode = data_source == "Live feed"
+    if not live_mode and "live_watcher" in st.session_state:
+        # Switched away from the live feed
+        live.release_feeds(st.session_state.pop("live_watcher"))
+    # Any number of CSV exports of The Paris Olympics-related tweets, plain, gzipped or zipped, or Parquet files
+    uploaded_files = st.file_uploader("Upload CSV files of The Paris Olympics-related tweets (.csv, .csv.gz, .zip or .parquet)",
+                                      type=ingest.UPLOAD_TYPES, accept_multiple_files=True) if data_source == "Upload" else []
+    uploaded = bool(uploaded_files)
+    save_to_store = uploaded and st.checkbox("Save scored tweets to the tweet store", key="dashboard_store")
+    # Only tweets an earlier file already had are removed, so a single file is never changed
+    deduplicate = uploaded and st.checkbox("Remove tweets repeated across files (retweets, overlapping scrapes)",
+                                           value=True, key="dashboard_dedupe")
+    dashboard_workers, dashboard_chunk_size, recorder = processing_options("dashboard")
+    sketch_error = top_k_option("dashboard") if uploaded else None
     
-    if uploaded_file is not None:
-        df = pd.read_csv(uploaded_file)
-        # Preprocess the dataframe
-        df = preprocess_dataframe(df)
+    # Verify local NLTK data once per process instead of downloading it on every run
+    missing_nltk = startup.ensure_nltk_resources() if uploaded or live_mode else ()
     
-        # 1. Word Cloud
-        st.subheader("Word Cloud of Tweets")
-        # Convert all Tweet_Content entries to strings and handle NaNs
-        df['Tweet_Content'] = df['Tweet_Content'].astype(str).fillna('')
-        # Join the tweets into a single text
-        text = " ".join(tweet for tweet in df['Tweet_Content'])
-        wordcloud = WordCloud(width=800, height=400, background_color='white', colormap="Dark2").generate(text)
-        plt.figure(figsize=(10, 5))
-        plt.imshow(wordcloud, interpolation='bilinear')
-        plt.axis('off')
-        st.pyplot(plt)
-        
-        # 2. Sentiment Distribution
-        st.subheader("Sentiment Distribution")
-        fig, ax = plt.subplots()
-        df['sentiment'].value_counts().plot(kind='bar', ax=ax , colormap="viridis")
-        plt.title("Sentiment Distribution")
-        plt.xlabel("Sentiment")
-        plt.ylabel("Count")
-        st.pyplot(fig)
-        
-        # 3. Sentiment Over Time
-        st.subheader("Sentiment Over Time")
-        daily_sentiment = df.groupby('date')['sentiment_score'].mean().reset_index()
-        fig, ax = plt.subplots(figsize=(12, 6))
-        ax.plot(daily_sentiment['date'], daily_sentiment['sentiment_score'], color='#000080')
-        plt.title("Average Sentiment Score Over Time")
-        plt.xlabel("Date")
-        plt.ylabel("Average Sentiment Score")
-        plt.xticks(rotation=45)
-        st.pyplot(fig)
-        
-        # 4. Top Hashtags
-        st.subheader("Top Hashtags")
-        hashtags = ' '.join(df['Tweet_Content'].apply(lambda x: ' '.join(re.findall(r'#\w+', x.lower())))).split()
-        hashtag_counts = pd.Series(hashtags).value_counts().head(10)
-        fig, ax = plt.subplots()
-        hashtag_counts.plot(kind='bar', ax=ax, colormap="Dark2")
-        plt.title("Top 10 Hashtags")
-        plt.xlabel("Hashtag")
-        plt.ylabel("Count")
-        plt.xticks(rotation=45)
-        st.pyplot(fig)
-        
-        # 5. Tweet Volume Over Time
-        st.subheader("Tweet Volume Over Time")
-        tweet_volume = df.groupby('date').size().reset_index(name='count')
-        fig, ax = plt.subplots(figsize=(12, 6))
-        ax.plot(tweet_volume['date'], tweet_volume['count'], color='#FFD700')
-        plt.title("Tweet Volume Over Time")
-        plt.xlabel("Date")
-        plt.ylabel("Number of Tweets")
-        plt.xticks(rotation=45)
-        st.pyplot(fig)
-        
-        # 6. Most Common Words
-        st.subheader("Most Common Words")
-        stop_words = set(stopwords.words('english'))
-        words = ' '.join(df['Tweet_Content']).lower().split()
-        words = [word for word in words if word not in stop_words and len(word) > 3]
-        word_freq = pd.Series(words).value_counts().head(20)
-        fig, ax = plt.subplots(figsize=(12, 6))
-        word_freq.plot(kind='bar', ax=ax, colormap="Dark2")
-        plt.title("Top 20 Most Common Words")
-        plt.xlabel("Word")
-        plt.ylabel("Frequency")
-        plt.xticks(rotation=45)
-        st.pyplot(fig)
+    if missing_nltk:
+        st.error(f"Missing NLTK data: {', '.join(missing_nltk)}. Install it with nltk.download() before uploading.")
+    elif live_mode:
+        show_live_feed(dashboard_workers)
+    elif data_source == "Tweet store":
+        show_tweet_store()
+    elif uploaded:
+        # Reuse the aggregates of identical uploads and model
+        upload_digest = uploads_digest(uploaded_files, "dashboard")
+        file_key = (upload_digest, 'dashboard', model_version, sketch_error, deduplicate)
+        aggregates = file_cache.get(file_key)
+        recorder.count('file_cache_hits' if aggregates is not None else 'file_cache_misses')
+        # Uploads already in the tweet store are not written twice
+        store_upload = save_to_store and not store.get_store().has_upload(upload_digest)
+        job = jobs.get_job(file_key)
+        if store_upload and job is not None and job.state == jobs.DONE:
+            # Finished before saving was asked for
+            jobs.forget(file_key)
+            job = None
+        ingestion = None
+        if job is None and (aggregates is None or store_upload):
+            # Several files are decompressed and parsed concurrently, in the worker processes with parallel processing on
+            try:
+                ingestion = ingest.Ingestion([(upload.name, upload.getvalue()) for upload in uploaded_files],
+                                             chunk_size=dashboard_chunk_size, deduplicate=deduplicate,
+                                             workers=dashboard_workers if dashboard_workers > 1 else None,
+                                             processes=dashboard_workers > 1, first_chunksize=streaming.FIRST_CHUNK_SIZE)
+            except ValueError as error:
+                st.error(f"Could not read the upload: {error}")
+        if ingestion is not None:
+            # Preprocess the upload chunk by chunk on a background thread, folding each chunk into running aggregates.
+            # With parallel processing, one process pool scores every chunk and is shut down when the job ends.
+            executor = parallel.make_pool(dashboard_workers) if dashboard_workers > 1 else None
+            file_chunks = recorder.iterate('read_files', ingestion)
+            chunks = (pipeline.preprocess_dataframe(chunk, loaded_vader, workers=dashboard_workers, cache=score_cache,
+                                                    recorder=recorder, executor=executor)
+                      for chunk in file_chunks)
+            if store_upload:
+                upload_name = ', '.join(upload.name for upload in uploaded_files)
+                chunks = store.get_store().save_chunks(chunks, upload_digest, upload_name, model_version)
+            chunks = parallel.shutdown_after(chunks, executor)
+            job = jobs.submit(file_key, jobs.BackgroundJob(
+                chunks, streaming.DashboardAggregates(stop_words=model_cache.get_text_normalizer().stop_words,
+                                                      sketch_error=sketch_error),
+                source=ingestion, size=ingestion.size, recorder=recorder, stage='aggregate',
+                on_done=lambda aggregates, file_key=file_key: file_cache.put(file_key, aggregates)))
+
+        # The chart tables, copied while the aggregates are not being updated
+        def dashboard_tables(aggregates):
+            return {
+                'sketch_error': (max(sketch.error for sketch in aggregates.sketches.values())
+                                 if aggregates.sketch_error is not None else None),
+                'word_cloud': aggregates.word_cloud_frequencies(),
+                'sentiment': aggregates.sentiment_distribution(),
+                'daily_sentiment': aggregates.daily_sentiment(),
+                'hashtags': aggregates.top_hashtags(10),
+                'volume': aggregates.tweet_volume(),
+                'words': aggregates.top_words(20),
+            }
+
+        def show_dashboard(tables, recorder):
+            show_cache_stats()
+            if tables['sketch_error'] is not None:
+                st.caption(f"Top hashtags and words are approximate: counts may be low by up to "
+                           f"{tables['sketch_error']:,}.")
+
+            # 1. Word Cloud
+            st.subheader("Word Cloud of Tweets")
+            recorder.start_laps()
+            show_chart(charts.word_cloud(tables['word_cloud']))
+            recorder.lap('chart: word cloud')
+
+            # 2. Sentiment Distribution
+            st.subheader("Sentiment Distribution")
+            show_chart(charts.bar_chart(tables['sentiment'], "Sentiment Distribution", "Sentiment",
+                                        "Count", colormap="viridis"))
+            recorder.lap('chart: sentiment distribution')
+
+            # 3. Sentiment Over Time
+            st.subheader("Sentiment Over Time")
+            show_chart(charts.line_chart(tables['daily_sentiment'], 'date', 'sentiment_score',
+                                         "Average Sentiment Score Over Time", "Date", "Average Sentiment Score",
+                                         color='#000080'))
+            recorder.lap('chart: sentiment over time')
+
+            # 4. Top Hashtags
+            st.subheader("Top Hashtags")
+            show_chart(charts.bar_chart(tables['hashtags'], "Top 10 Hashtags", "Hashtag", "Count",
+                                        colormap="Dark2", rotate=True))
+            recorder.lap('chart: top hashtags')
+
+            # 5. Tweet Volume Over Time
+            st.subheader("Tweet Volume Over Time")
+            show_chart(charts.line_chart(tables['volume'], 'date', 'count', "Tweet Volume Over Time", "Date",
+                                         "Number of Tweets", color='#FFD700'))
+            recorder.lap('chart: tweet volume')
+
+            # 6. Most Common Words
+            st.subheader("Most Common Words")
+            show_chart(charts.bar_chart(tables['words'], "Top 20 Most Common Words", "Word", "Frequency",
+                                        colormap="Dark2", rotate=True, figsize=(12, 6)))
+            recorder.lap('chart: top words')
+
+        # Partial charts while the upload is processed, then the final ones
+        if job is not None:
+            if job.state in (jobs.CANCELLED, jobs.FAILED) and st.button("Process again", key="dashboard_restart"):
+                jobs.forget(file_key)
+                st.rerun()
+            if job.state == jobs.DONE and len(job.source.parts) > 1:
+                st.caption(f"Read {job.source.rows_read:,} tweets from {len(job.source.parts)} files, "
+                           f"removed {job.source.duplicates_removed:,} near-duplicates of tweets in earlier files.")
+            show_job(job, dashboard_tables, show_dashboard, recorder, "dashboard")
+        elif aggregates is not None:
+            show_dashboard(dashboard_tables(aggregates), recorder)
+            show_performance(recorder, "dashboard")
         
 
 # Team tab
 with tabs[3]:
     st.title("The Data Sentinels")
     # Load Lottie animation
-    lottie_url = "https://lottie.host/18039274-4e01-4558-845e-a1d1d3b950eb/cKT9Btma01.json"  
+    lottie_url = startup.LOTTIE_URLS['team']
     lottie_json = load_lottieurl(lottie_url)
-    st_lottie(lottie_json, height=200)
+    show_lottie(lottie_json)
     # Style contact icons
     st.markdown("""
     <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0/css/all.min.css">
@@ -486,9 +723,9 @@ with tabs[3]:
 with tabs[4]:
     st.title("About The App")
     # Load lottie animation
-    lottie_url = "https://lottie.host/93047e01-af1c-425a-89f5-c4d49abc3aaa/LVMzN5PPXM.json"  
+    lottie_url = startup.LOTTIE_URLS['about']
     lottie_json = load_lottieurl(lottie_url)
-    st_lottie(lottie_json, height=200)
+    show_lottie(lottie_json)
     
     st.write(""" The Olympic Sentiment Analyzer is a powerful tool designed to analyze public sentiment surrounding the 2024 Paris Olympic Games. Our application leverages advanced natural language processing and machine learning techniques to process large volumes of text data from X and user-submitted content.
     
@@ -537,3 +774,5 @@ with tabs[5]:
 # Footer 
 st.markdown("---")
 st.markdown("© 2024 Olympic Sentiment Analyzer. All rights reserved.")
+
+startup.log_render_time(run_start)